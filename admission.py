@@ -0,0 +1,157 @@
+import os
+import math
+import time
+import threading
+import itertools
+
+from solver import SOLVER_TIME_LIMIT_MS
+
+# Relative cost of each objective's MIP compared to min_bins
+OBJECTIVE_COST_FACTORS = {
+    'min_bins': 1.0,
+    'max_weight': 1.5,
+    'max_items': 2.0,
+    'balance_bins': 2.0
+}
+
+# Estimated solver seconds per (item count)^2, for the n^2 assignment model
+SECONDS_PER_ITEM_PAIR = 0.001
+
+# Smallest cost charged for any request
+MIN_COST = 0.05
+
+def estimate_solve_cost(item_count, objective):
+    """Estimate the cost of one solve_bin_packing call in solver seconds.
+    The model has item_count^2 assignment variables, so cost grows
+    quadratically until it is capped by the solver time limit.
+    """
+    factor = OBJECTIVE_COST_FACTORS.get(objective, max(OBJECTIVE_COST_FACTORS.values()))
+    seconds = SECONDS_PER_ITEM_PAIR * item_count * item_count * factor
+    return min(SOLVER_TIME_LIMIT_MS / 1000, max(MIN_COST, seconds))
+
+def estimate_request_cost(endpoint, data):
+    """Estimate the cost of an API request in solver seconds.
+    endpoint: 'solve' or 'compare'.
+    data: The parsed JSON body of the request.
+    """
+    item_count = len(data.get('weights') or [])
+
+    if endpoint == 'compare':
+        # /api/compare solves every objective in turn
+        return sum(estimate_solve_cost(item_count, objective) for objective in OBJECTIVE_COST_FACTORS)
+
+    cost = estimate_solve_cost(item_count, data.get('objective', 'min_bins'))
+    if data.get('improve'):
+        # The LNS stage keeps its workers busy for the whole time limit
+        # web_app clamps the requested workers to the core count
+        workers = max(1, min(data.get('improve_workers') or 4, os.cpu_count() or 1))
+        cost += max(0, data.get('improve_time_limit', 5)) * workers
+    return cost
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted.
+    status: HTTP status to return (429 for rate limits, 503 for overload).
+    retry_after: Suggested number of seconds before retrying, or None if
+        retrying cannot help.
+    """
+    def __init__(self, message, status, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Admission control for expensive requests within one worker process.
+    - A global budget caps the total estimated cost of requests in flight.
+    - Part of the budget is reserved for small requests (the priority lane),
+      so cheap requests are not starved by large ones.
+    - Each client has a token bucket refilled at client_rate cost units per
+      second, up to client_burst.
+    Requests that cannot be admitted are rejected immediately rather than queued.
+    """
+    def __init__(self, budget=40, small_cost=2, reserved_for_small=10, client_rate=2, client_burst=40,
+                 max_clients=10000):
+        if reserved_for_small >= budget:
+            raise ValueError("The share reserved for small requests must be smaller than the budget")
+        self.budget = budget
+        self.small_cost = small_cost
+        self.reserved_for_small = reserved_for_small
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+
+        self._lock = threading.Lock()
+        self._in_flight = {}  # ticket -> (cost, expected end time)
+        self._buckets = {}  # client id -> (tokens, last refill time)
+        self._tickets = itertools.count()
+
+    @classmethod
+    def from_env(cls):
+        """Create a controller configured from BINPACK_* environment variables"""
+        return cls(
+            budget=float(os.environ.get('BINPACK_COST_BUDGET', 40)),
+            small_cost=float(os.environ.get('BINPACK_SMALL_COST', 2)),
+            reserved_for_small=float(os.environ.get('BINPACK_RESERVED_SMALL', 10)),
+            client_rate=float(os.environ.get('BINPACK_CLIENT_RATE', 2)),
+            client_burst=float(os.environ.get('BINPACK_CLIENT_BURST', 40))
+        )
+
+    def admit(self, client_id, cost):
+        """Admit a request or raise AdmissionRejected.
+
+        Returns:
+          - A ticket to pass to release() once the request has finished.
+        """
+        now = time.time()
+        # A single request may never be charged more than a full bucket or the
+        # share of the budget it can use, or it could never be admitted
+        cost = min(cost, self.client_burst, self.budget)
+        if cost > self.small_cost:
+            cost = min(cost, self.budget - self.reserved_for_small)
+
+        with self._lock:
+            # Per-client token bucket
+            tokens, last = self._buckets.get(client_id, (self.client_burst, now))
+            tokens = min(self.client_burst, tokens + (now - last) * self.client_rate)
+            if tokens < cost:
+                self._buckets[client_id] = (tokens, now)
+                retry_after = (cost - tokens) / self.client_rate
+                raise AdmissionRejected("Rate limit exceeded, please slow down", 429, math.ceil(retry_after))
+
+            # Global budget; large requests cannot use the share reserved for small ones
+            in_flight = sum(c for c, _ in self._in_flight.values())
+            available = self.budget - in_flight
+            if cost > self.small_cost:
+                available -= self.reserved_for_small
+            if cost > available:
+                if not self._in_flight:
+                    raise AdmissionRejected("Request is too large to be admitted", 413, None)
+                retry_after = self._time_until_available(cost - available, now)
+                raise AdmissionRejected("Server is busy, please retry later", 503, math.ceil(retry_after))
+
+            self._buckets[client_id] = (tokens - cost, now)
+            if len(self._buckets) > self.max_clients:
+                self._prune_buckets(now)
+
+            ticket = next(self._tickets)
+            self._in_flight[ticket] = (cost, now + cost)
+            return ticket
+
+    def release(self, ticket):
+        """Return a finished request's cost to the budget"""
+        with self._lock:
+            self._in_flight.pop(ticket, None)
+
+    def _time_until_available(self, needed, now):
+        """Estimate when enough in-flight cost will have finished"""
+        freed = 0
+        for cost, end in sorted(self._in_flight.values(), key=lambda entry: entry[1]):
+            freed += cost
+            if freed >= needed:
+                return max(1, end - now)
+        return 1
+
+    def _prune_buckets(self, now):
+        """Forget clients whose buckets would be full again"""
+        for client_id, (tokens, last) in list(self._buckets.items()):
+            if tokens + (now - last) * self.client_rate >= self.client_burst:
+                del self._buckets[client_id]
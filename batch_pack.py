@@ -0,0 +1,410 @@
+"""Streaming batch packer for order files.
+
+Reads a CSV or Parquet file of order lines (one row per item) in chunks,
+groups consecutive rows by order id, packs each order in a process pool and
+writes the bin assignments incrementally to CSV or Parquet. Progress is
+checkpointed so an interrupted run can be resumed with --resume.
+
+The input must be grouped by order id (all rows of an order next to each
+other), which is what keeps memory bounded. An order id that comes back later
+is packed as a separate order, unless --check-grouping is given to fail instead. Optional --group-col and
+--separate-col columns tag items that must share a bin or must not.
+
+Example:
+    python batch_pack.py orders.csv assignments.csv --capacity 100 --workers 8
+"""
+import os
+import sys
+import csv
+import math
+import json
+import time
+import argparse
+from collections import deque, Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from solver import solve_bin_packing
+from constraints import pack_heuristic
+
+OUTPUT_COLUMNS = ['order_id', 'item_id', 'weight', 'bin', 'engine', 'error']
+
+ENGINES = ['auto', 'exact', 'ffd']
+# balance_bins needs a bin count per order, which batches do not have
+OBJECTIVES = ['min_bins', 'max_weight', 'max_items']
+
+def import_pyarrow():
+    """Parquet support needs pyarrow, which is optional"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise SystemExit("Error: Parquet files need pyarrow (pip install pyarrow)")
+
+def parse_weight(value):
+    weight = float(value)
+    return int(weight) if weight.is_integer() else weight
+
+def read_csv_rows(path, args):
+    """Yield (order_id, item_id, weight, capacity, group, separate) for each row of a CSV file"""
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield (
+                row[args.order_col],
+                row[args.item_col] if args.item_col else None,
+                parse_weight(row[args.weight_col]),
+                parse_weight(row[args.capacity_col]) if args.capacity_col else args.capacity,
+                row[args.group_col] or None if args.group_col else None,
+                row[args.separate_col] or None if args.separate_col else None
+            )
+
+def read_parquet_rows(path, args):
+    """Yield (order_id, item_id, weight, capacity, group, separate) for each row of a Parquet file, a batch at a time"""
+    pyarrow = import_pyarrow()
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    columns = [c for c in (args.order_col, args.item_col, args.weight_col, args.capacity_col,
+                           args.group_col, args.separate_col) if c]
+    for batch in parquet_file.iter_batches(batch_size=args.chunk_rows, columns=columns):
+        data = batch.to_pydict()
+        orders = data[args.order_col]
+        items = data[args.item_col] if args.item_col else [None] * len(orders)
+        weights = data[args.weight_col]
+        capacities = data[args.capacity_col] if args.capacity_col else [args.capacity] * len(orders)
+        groups = data[args.group_col] if args.group_col else [None] * len(orders)
+        separates = data[args.separate_col] if args.separate_col else [None] * len(orders)
+        for order_id, item_id, weight, capacity, group, separate in zip(orders, items, weights, capacities, groups, separates):
+            yield str(order_id), item_id, parse_weight(weight), parse_weight(capacity), group, separate
+
+def group_orders(rows, check_grouping=False):
+    """Group consecutive rows into orders: yield (order_id, capacity, [(item_id, weight, group, separate), ...])
+    check_grouping: Fail if an order id comes back after other orders. This
+        remembers every order id, so memory grows with the number of orders.
+    """
+    seen = set()
+    current_id = None
+    current_capacity = None
+    items = []
+    for order_id, item_id, weight, capacity, group, separate in rows:
+        if order_id != current_id:
+            if current_id is not None:
+                yield current_id, current_capacity, items
+            if check_grouping:
+                if order_id in seen:
+                    raise ValueError(f"Order {order_id} appears again after other orders; the input must be grouped by order id")
+                seen.add(order_id)
+            current_id = order_id
+            current_capacity = capacity
+            items = []
+        items.append((item_id if item_id is not None else len(items), weight, group, separate))
+    if current_id is not None:
+        yield current_id, current_capacity, items
+
+def order_constraints(items):
+    """Affinity groups and conflicts from the group/separate tags of an order.
+    Items sharing a separate tag form a clique of conflicts.
+
+    Returns:
+      - (conflicts, affinity_groups, largest separate tag count)
+    """
+    groups = {}
+    separates = {}
+    for i, (_, _, group, separate) in enumerate(items):
+        if group is not None:
+            groups.setdefault(group, []).append(i)
+        if separate is not None:
+            separates.setdefault(separate, []).append(i)
+    affinity_groups = [members for members in groups.values() if len(members) > 1]
+    conflicts = [[a, b] for members in separates.values() for k, a in enumerate(members) for b in members[k + 1:]]
+    largest = max((len(members) for members in separates.values()), default=0)
+    return conflicts, affinity_groups, largest
+
+def pack_order(order_id, capacity, items, options):
+    """Pack one order. Returns (output rows, bin count, engine used).
+    The auto engine packs with the heuristic (first-fit decreasing, DSATUR
+    when items are tagged to be kept apart) and only runs the exact solver
+    when the heuristic misses the lower bound and the order is small enough.
+    """
+    weights = [item[1] for item in items]
+    conflicts, affinity_groups, largest_separate = order_constraints(items)
+    engine = options['engine']
+
+    error = None
+    packed_bins = None
+    if capacity is None or capacity <= 0:
+        error = "Bin capacity must be positive"
+    elif max(weights) > capacity:
+        error = "Some items exceed bin capacity"
+    else:
+        if engine in ('auto', 'ffd'):
+            packed = pack_heuristic(weights, capacity, conflicts, affinity_groups)
+            if 'error' in packed:
+                error = packed['error']
+                engine = 'ffd'
+            else:
+                packed_bins = list(packed.values())
+                # The heuristic ignores the minimum; only keep its packing if every bin meets it anyway
+                if any(len(bin_items) < options['min_items_per_bin'] for bin_items in packed_bins):
+                    packed_bins = None
+            lower_bound = max(math.ceil(sum(weights) / capacity), largest_separate)
+            if engine == 'auto' and error is None:
+                proven_optimal = packed_bins is not None and len(packed_bins) == lower_bound
+                engine = 'exact' if not proven_optimal and len(items) <= options['exact_max_items'] else 'ffd'
+            if engine == 'ffd' and packed_bins is None and error is None:
+                error = f"The heuristic leaves bins with fewer than {options['min_items_per_bin']} items"
+
+        if engine == 'exact':
+            result = solve_bin_packing(weights, capacity, options['objective'], options['min_items_per_bin'],
+                                       time_limit_ms=options['exact_time_limit_ms'],
+                                       conflicts=conflicts, affinity_groups=affinity_groups)
+            if 'error' not in result and (packed_bins is None or result['bin_count'] <= len(packed_bins)):
+                packed_bins = [bin_data['items'] for bin_data in result['bins']]
+            elif packed_bins is not None:
+                # Keep the heuristic packing when the exact solver fails or does worse
+                engine = 'ffd'
+            else:
+                error = result['error']
+
+    if error is not None:
+        rows = [(order_id, item_id, weight, None, engine, error) for item_id, weight, _, _ in items]
+        return rows, 0, engine
+
+    rows = []
+    for bin_number, bin_items in enumerate(packed_bins, start=1):
+        for i in bin_items:
+            item_id, weight, _, _ = items[i]
+            rows.append((order_id, item_id, weight, bin_number, engine, None))
+    return rows, len(packed_bins), engine
+
+def pack_chunk(orders, options):
+    """Pack a chunk of orders in a worker process"""
+    return [pack_order(order_id, capacity, items, options) for order_id, capacity, items in orders]
+
+def chunked(orders, chunk_orders, skip):
+    """Skip the orders already done in a previous run, then yield lists of orders"""
+    chunk = []
+    for index, order in enumerate(orders):
+        if index < skip:
+            continue
+        chunk.append(order)
+        if len(chunk) >= chunk_orders:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class CsvOutput:
+    """Appends rows to a CSV file; the byte size is the checkpointed position"""
+    def __init__(self, path, resume_state):
+        if resume_state:
+            # Drop anything written after the last checkpoint
+            self.file = open(path, 'r+', newline='')
+            self.file.truncate(resume_state['bytes'])
+            self.file.seek(resume_state['bytes'])
+            self.writer = csv.writer(self.file)
+        else:
+            self.file = open(path, 'w', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(OUTPUT_COLUMNS)
+
+    def write(self, rows):
+        self.writer.writerows(('' if value is None else value for value in row) for row in rows)
+
+    def commit(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {'bytes': self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+class ParquetOutput:
+    """Writes a Parquet dataset directory with one part file per checkpoint"""
+    def __init__(self, path, resume_state):
+        self.pyarrow = import_pyarrow()
+        self.path = path
+        self.part = resume_state['parts'] if resume_state else 0
+        os.makedirs(path, exist_ok=True)
+
+        # Remove parts written after the last checkpoint (or by an earlier run)
+        for name in os.listdir(path):
+            if name.startswith('part-') and int(name[5:10]) >= self.part:
+                os.remove(os.path.join(path, name))
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+    def commit(self):
+        if self.rows:
+            columns = list(zip(*self.rows))
+            table = self.pyarrow.table({
+                'order_id': self.pyarrow.array(columns[0], self.pyarrow.string()),
+                'item_id': self.pyarrow.array([str(v) for v in columns[1]], self.pyarrow.string()),
+                'weight': self.pyarrow.array(columns[2], self.pyarrow.float64()),
+                'bin': self.pyarrow.array(columns[3], self.pyarrow.int64()),
+                'engine': self.pyarrow.array(columns[4], self.pyarrow.string()),
+                'error': self.pyarrow.array(columns[5], self.pyarrow.string())
+            })
+            part_path = os.path.join(self.path, f'part-{self.part:05d}.parquet')
+            self.pyarrow.parquet.write_table(table, part_path + '.tmp')
+            os.replace(part_path + '.tmp', part_path)
+            self.part += 1
+            self.rows = []
+        return {'parts': self.part}
+
+    def close(self):
+        pass
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically"""
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def run(args):
+    checkpoint_path = args.checkpoint or args.output + '.checkpoint.json'
+    checkpoint = load_checkpoint(checkpoint_path) if args.resume else None
+    if checkpoint and checkpoint['input'] != os.path.abspath(args.input):
+        raise SystemExit(f"Error: checkpoint {checkpoint_path} belongs to {checkpoint['input']}")
+
+    totals = Counter(checkpoint['totals']) if checkpoint else Counter()
+    engines = Counter(checkpoint['engines']) if checkpoint else Counter()
+    output_state = checkpoint['output_state'] if checkpoint else None
+
+    is_parquet_input = args.input.endswith('.parquet')
+    rows = read_parquet_rows(args.input, args) if is_parquet_input else read_csv_rows(args.input, args)
+    orders = group_orders(rows, args.check_grouping)
+    output = ParquetOutput(args.output, output_state) if args.output.endswith('.parquet') else CsvOutput(args.output, output_state)
+
+    options = {
+        'engine': args.engine,
+        'objective': args.objective,
+        'min_items_per_bin': args.min_items_per_bin,
+        'exact_max_items': args.exact_max_items,
+        'exact_time_limit_ms': int(args.exact_time_limit * 1000)
+    }
+
+    start = time.time()
+    run_orders = 0
+    run_items = 0
+    last_checkpoint_orders = totals['orders']
+
+    def commit():
+        state = output.commit()
+        save_checkpoint(checkpoint_path, {
+            'input': os.path.abspath(args.input),
+            'output': os.path.abspath(args.output),
+            'totals': dict(totals),
+            'engines': dict(engines),
+            'output_state': state,
+            'updated': time.strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    # Keep a bounded window of chunks in flight and write results in input order
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        pending = deque()
+        chunks = chunked(orders, args.chunk_orders, totals['orders'])
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < args.workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending.append(executor.submit(pack_chunk, chunk, options))
+            if not pending:
+                break
+
+            for order_rows, bins, engine in pending.popleft().result():
+                output.write(order_rows)
+                totals['orders'] += 1
+                totals['items'] += len(order_rows)
+                totals['bins'] += bins
+                if order_rows and order_rows[0][5] is not None:
+                    totals['errors'] += 1
+                engines[engine] += 1
+                run_orders += 1
+                run_items += len(order_rows)
+
+            if totals['orders'] - last_checkpoint_orders >= args.checkpoint_every:
+                commit()
+                last_checkpoint_orders = totals['orders']
+                if args.progress:
+                    elapsed = time.time() - start
+                    print(f"{totals['orders']} orders, {totals['items']} items, "
+                          f"{run_orders / elapsed:.0f} orders/s", file=sys.stderr)
+
+    commit()
+    output.close()
+
+    elapsed = time.time() - start
+    return {
+        'orders': totals['orders'],
+        'items': totals['items'],
+        'bins': totals['bins'],
+        'errors': totals['errors'],
+        'engines': dict(engines),
+        'resumed_from_orders': checkpoint['totals'].get('orders', 0) if checkpoint else 0,
+        'elapsed_s': round(elapsed, 2),
+        'orders_per_s': round(run_orders / elapsed, 1) if elapsed > 0 else None,
+        'items_per_s': round(run_items / elapsed, 1) if elapsed > 0 else None,
+        'workers': args.workers
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pack order files (CSV or Parquet) into bins.")
+    parser.add_argument('input', help="Input .csv or .parquet file, grouped by order id")
+    parser.add_argument('output', help="Output .csv file, or .parquet dataset directory")
+    parser.add_argument('--capacity', type=float, help="Bin capacity for every order")
+    parser.add_argument('--capacity-col', help="Column with the bin capacity (read from each order's first row)")
+    parser.add_argument('--order-col', default='order_id', help="Order id column (default: order_id)")
+    parser.add_argument('--weight-col', default='weight', help="Item weight column (default: weight)")
+    parser.add_argument('--item-col', help="Item id column (default: position within the order)")
+    parser.add_argument('--check-grouping', action='store_true',
+                        help="Fail if an order id reappears after other orders (memory grows with the number of orders)")
+    parser.add_argument('--group-col', help="Column tagging items of an order that must share a bin")
+    parser.add_argument('--separate-col', help="Column tagging items of an order that must go in different bins")
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help="exact (solve_bin_packing), ffd (first-fit decreasing; orders it cannot pack with "
+                             "--min-items-per-bin get an error row) or "
+                             "auto (ffd, then exact for small orders where ffd is not provably optimal)")
+    parser.add_argument('--exact-max-items', type=int, default=20, help="Largest order auto packs exactly (default: 20)")
+    parser.add_argument('--exact-time-limit', type=float, default=1,
+                        help="Time limit per exact solve in seconds; the best packing found is kept (default: 1)")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='min_bins',
+                        help="Objective for the exact engine; ffd packings always minimise bins (default: min_bins)")
+    parser.add_argument('--min-items-per-bin', type=int, default=1, help="Minimum items per bin for the exact engine")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (default: all cores)")
+    parser.add_argument('--chunk-orders', type=int, default=200, help="Orders per task sent to a worker")
+    parser.add_argument('--chunk-rows', type=int, default=65536, help="Rows per Parquet read batch")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument('--checkpoint-every', type=int, default=10000, help="Orders between checkpoints")
+    parser.add_argument('--resume', action='store_true', help="Resume from the checkpoint of an interrupted run")
+    parser.add_argument('--progress', action='store_true', help="Print progress at each checkpoint")
+
+    args = parser.parse_args(argv)
+    if args.capacity is None and not args.capacity_col:
+        parser.error("either --capacity or --capacity-col is required")
+    if args.capacity is not None:
+        args.capacity = parse_weight(args.capacity)
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        summary = run(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
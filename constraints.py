@@ -0,0 +1,161 @@
+import math
+
+def validate_item_indices(item_count, conflicts, affinity_groups):
+    """Check that constraint lists only refer to existing items.
+
+    Returns:
+      - An error message, or None if the constraints are well formed.
+    """
+    if not isinstance(conflicts or [], (list, tuple)) or not isinstance(affinity_groups or [], (list, tuple)):
+        return "Conflicts and affinity groups must be lists"
+    for pair in conflicts or []:
+        if not isinstance(pair, (list, tuple)) or len(pair) != 2 or pair[0] == pair[1]:
+            return f"Conflicts must be pairs of two different items, got {pair}"
+        for i in pair:
+            if not isinstance(i, int) or isinstance(i, bool) or not 0 <= i < item_count:
+                return f"Conflict refers to unknown item {i}"
+    for group in affinity_groups or []:
+        if not isinstance(group, (list, tuple)):
+            return f"Affinity groups must be lists of items, got {group}"
+        for i in group:
+            if not isinstance(i, int) or isinstance(i, bool) or not 0 <= i < item_count:
+                return f"Affinity group refers to unknown item {i}"
+    return None
+
+def remap_constraints(conflicts, affinity_groups, order):
+    """Map constraints given in input order onto reordered (e.g. sorted) items.
+    order: order[new_position] is the input index of the item now at new_position.
+    """
+    position = {original: new for new, original in enumerate(order)}
+    return (
+        [[position[a], position[b]] for a, b in conflicts or []],
+        [[position[i] for i in group] for group in affinity_groups or []]
+    )
+
+def build_units(order_weights, conflicts=None, affinity_groups=None):
+    """Merge items that must be packed together into super-items ("units").
+    Overlapping affinity groups are merged with union-find. Without any
+    constraints every item is its own unit.
+
+    Returns:
+      - A dictionary with the members, weights and sizes (item counts) of each
+        unit and the conflicts between units, or a dictionary with an error.
+    """
+    parent = list(range(len(order_weights)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for group in affinity_groups or []:
+        for i in group[1:]:
+            parent[find(i)] = find(group[0])
+
+    # Number the units in order of their first item
+    unit_of = {}
+    members = []
+    for i in range(len(order_weights)):
+        root = find(i)
+        if root not in unit_of:
+            unit_of[root] = len(members)
+            members.append([])
+        members[unit_of[root]].append(i)
+    item_unit = [unit_of[find(i)] for i in range(len(order_weights))]
+
+    unit_conflicts = set()
+    for a, b in conflicts or []:
+        unit_a, unit_b = item_unit[a], item_unit[b]
+        if unit_a == unit_b:
+            return {"error": f"Items {a} and {b} conflict but must be packed together"}
+        unit_conflicts.add((min(unit_a, unit_b), max(unit_a, unit_b)))
+
+    return {
+        "members": members,
+        "weights": [sum(order_weights[i] for i in unit) for unit in members],
+        "sizes": [len(unit) for unit in members],
+        "conflicts": sorted(unit_conflicts)
+    }
+
+def conflict_neighbours(unit_count, conflicts):
+    """Adjacency sets of the conflict graph"""
+    neighbours = [set() for _ in range(unit_count)]
+    for a, b in conflicts:
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+    return neighbours
+
+def greedy_max_clique(neighbours):
+    """Find a large clique in the conflict graph.
+    Grows a clique greedily from every vertex (highest degree first) and keeps
+    the largest; every item of a clique needs its own bin.
+    """
+    by_degree = sorted(range(len(neighbours)), key=lambda v: len(neighbours[v]), reverse=True)
+    best = []
+    for start in by_degree:
+        if len(neighbours[start]) + 1 <= len(best):
+            break  # No larger clique can contain this or any later vertex
+        clique = [start]
+        candidates = set(neighbours[start])
+        while candidates:
+            v = max(candidates, key=lambda u: len(neighbours[u] & candidates))
+            clique.append(v)
+            candidates &= neighbours[v]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+def lower_bound(weights, bin_capacity, clique):
+    """Lower bound on the number of bins: total weight, or the largest conflict clique"""
+    return max(math.ceil(sum(weights) / bin_capacity), len(clique), 1 if weights else 0)
+
+def dsatur_pack(weights, bin_capacity, neighbours):
+    """Pack units with a DSATUR-style heuristic for bin packing with conflicts.
+    The next unit is the one whose conflicting units already occupy the most
+    distinct bins (ties: heaviest first). It goes into the first bin that has
+    room and no conflicting unit. Without conflicts this is first-fit decreasing.
+
+    Returns:
+      - A list of bins, each a list of unit indices.
+    """
+    bins = []
+    loads = []
+    saturation = [set() for _ in weights]
+    unpacked = set(range(len(weights)))
+
+    while unpacked:
+        unit = max(unpacked, key=lambda u: (len(saturation[u]), weights[u], len(neighbours[u]), -u))
+        unpacked.remove(unit)
+
+        for j, load in enumerate(loads):
+            if load + weights[unit] <= bin_capacity and j not in saturation[unit]:
+                break
+        else:
+            j = len(bins)
+            bins.append([])
+            loads.append(0)
+
+        bins[j].append(unit)
+        loads[j] += weights[unit]
+        for other in neighbours[unit]:
+            saturation[other].add(j)
+
+    return bins
+
+def pack_heuristic(order_weights, bin_capacity, conflicts=None, affinity_groups=None):
+    """Heuristic packing that respects conflicts and affinity groups.
+
+    Returns:
+      - A dictionary mapping bin id to the list of item indices in that bin,
+        or a dictionary with an error.
+    """
+    units = build_units(order_weights, conflicts, affinity_groups)
+    if "error" in units:
+        return units
+    if any(w > bin_capacity for w in units["weights"]):
+        return {"error": "An affinity group exceeds bin capacity"}
+
+    neighbours = conflict_neighbours(len(units["weights"]), units["conflicts"])
+    bins = dsatur_pack(units["weights"], bin_capacity, neighbours)
+    return {j: sorted(i for u in unit_bin for i in units["members"][u]) for j, unit_bin in enumerate(bins)}
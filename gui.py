@@ -1,9 +1,52 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import json
-import random
+import colorsys
 import os
-from solver import solve_bin_packing
+import math
+import time
+import queue
+import multiprocessing
+from solver import solve_bin_packing, first_fit_decreasing, format_bins
+
+# How often the Tk main loop polls the solver process for updates
+POLL_INTERVAL_MS = 100
+
+# Bin drawing parameters
+BIN_WIDTH = 100
+BIN_HEIGHT = 300
+BIN_SPACING = 40
+BIN_MARGIN = 50
+
+# Items shorter than this (in pixels, on average) are aggregated into a single fill bar
+MIN_ITEM_HEIGHT = 4
+
+def item_color(item):
+    """Consistent color for an item, so redraws while scrolling don't flicker"""
+    hue = (item * 137) % 360 / 360
+    r, g, b = colorsys.hls_to_rgb(hue, 0.65, 0.6)
+    return f"#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}"
+
+def solve_worker(result_queue, weights, bin_capacity, objective, min_items, bin_count):
+    """Runs in a separate process so the Tk main loop never blocks.
+    Posts a quick heuristic incumbent first (min_bins only), then the solver result.
+    """
+    # An item heavier than a bin would get an overfull bin of its own
+    if objective == 'min_bins' and max(weights) <= bin_capacity:
+        packed_bins = first_fit_decreasing(weights, bin_capacity)
+        if all(len(items) >= min_items for items in packed_bins.values()):
+            result_queue.put({
+                "type": "incumbent",
+                "result": {
+                    "bins": format_bins(packed_bins, weights, bin_capacity),
+                    "bin_count": len(packed_bins),
+                    "objective": objective,
+                    "status": "heuristic"
+                }
+            })
+    
+    result = solve_bin_packing(weights, bin_capacity, objective, min_items, bin_count)
+    result_queue.put({"type": "final", "result": result})
 
 class BinPackingApp:
     def __init__(self, root):
@@ -11,7 +54,20 @@ class BinPackingApp:
         self.root.title("Bin Packing Solver")
         self.root.geometry("1000x700")
         
+        # Bins currently shown on the canvas: (bin_id, items) pairs, weights, capacity
+        self.drawn_bins = []
+        self.drawn_weights = []
+        self.drawn_capacity = 1
+        
+        # State of the running solve (if any)
+        self.solve_process = None
+        self.solve_queue = None
+        self.solve_config = None
+        self.solve_start = None
+        self.best_result = None
+        
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def create_widgets(self):
         # Main frame
@@ -41,6 +97,8 @@ class BinPackingApp:
         objective_frame.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
         ttk.Radiobutton(objective_frame, text="Minimize Bins", variable=self.objective_var, value="min_bins").pack(side=tk.LEFT, padx=5)
         ttk.Radiobutton(objective_frame, text="Maximize Weight", variable=self.objective_var, value="max_weight").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(objective_frame, text="Maximize Items", variable=self.objective_var, value="max_items").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(objective_frame, text="Balance Bins", variable=self.objective_var, value="balance_bins").pack(side=tk.LEFT, padx=5)
         
         # Min items per bin
         ttk.Label(input_frame, text="Min Items Per Bin:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
@@ -48,13 +106,23 @@ class BinPackingApp:
         self.min_items_entry.grid(row=3, column=1, sticky=tk.W, padx=5, pady=5)
         self.min_items_entry.insert(0, "1")
         
+        # Bin count (only used by the balance_bins objective)
+        ttk.Label(input_frame, text="Bin Count (Balance Bins):").grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+        self.bin_count_entry = ttk.Entry(input_frame, width=10)
+        self.bin_count_entry.grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
+        self.bin_count_entry.insert(0, "3")
+        
         # Buttons frame
         buttons_frame = ttk.Frame(input_frame)
-        buttons_frame.grid(row=4, column=0, columnspan=2, pady=10)
+        buttons_frame.grid(row=5, column=0, columnspan=2, pady=10)
         
         # Solve button
-        solve_button = ttk.Button(buttons_frame, text="Solve", command=self.solve)
-        solve_button.pack(side=tk.LEFT, padx=5)
+        self.solve_button = ttk.Button(buttons_frame, text="Solve", command=self.solve)
+        self.solve_button.pack(side=tk.LEFT, padx=5)
+        
+        # Cancel button, only enabled while a solve is running
+        self.cancel_button = ttk.Button(buttons_frame, text="Cancel", command=self.cancel_solve, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
         
         # Save config button
         save_button = ttk.Button(buttons_frame, text="Save Config", command=self.save_config)
@@ -64,6 +132,10 @@ class BinPackingApp:
         load_button = ttk.Button(buttons_frame, text="Load Config", command=self.load_config)
         load_button.pack(side=tk.LEFT, padx=5)
         
+        # Solve progress: elapsed time, current bins and gap
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(input_frame, textvariable=self.status_var).grid(row=6, column=0, columnspan=2, sticky=tk.W, padx=5)
+        
         # Results section - split into tabs
         results_notebook = ttk.Notebook(main_frame)
         results_notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -90,8 +162,9 @@ class BinPackingApp:
         self.canvas = tk.Canvas(canvas_frame, bg="white", xscrollcommand=h_scrollbar.set)
         self.canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         
-        # Configure the scrollbar
-        h_scrollbar.config(command=self.canvas.xview)
+        # Configure the scrollbar; only visible bins are drawn, so redraw on scroll and resize
+        h_scrollbar.config(command=self.on_canvas_scroll)
+        self.canvas.bind("<Configure>", lambda event: self.render_visible_bins())
     
     def get_current_config(self):
         """Get current configuration from the UI fields"""
@@ -102,7 +175,8 @@ class BinPackingApp:
             "weights": weights,
             "bin_capacity": int(self.capacity_entry.get()),
             "objective": self.objective_var.get(),
-            "min_items_per_bin": int(self.min_items_entry.get())
+            "min_items_per_bin": int(self.min_items_entry.get()),
+            "bin_count": int(self.bin_count_entry.get())
         }
         return config
     
@@ -118,6 +192,10 @@ class BinPackingApp:
         
         self.min_items_entry.delete(0, tk.END)
         self.min_items_entry.insert(0, str(config["min_items_per_bin"]))
+        
+        if config.get("bin_count"):
+            self.bin_count_entry.delete(0, tk.END)
+            self.bin_count_entry.insert(0, str(config["bin_count"]))
     
     def save_config(self):
         """Save current configuration to a JSON file"""
@@ -165,12 +243,16 @@ class BinPackingApp:
             messagebox.showerror("Error", f"Failed to load configuration: {str(e)}")
         
     def solve(self):
+        if self.solve_process is not None:
+            return  # A solve is already running
+        
         try:
             config = self.get_current_config()
             weights = config["weights"]
             bin_capacity = config["bin_capacity"]
             objective = config["objective"]
             min_items = config["min_items_per_bin"]
+            bin_count = config["bin_count"] if objective == 'balance_bins' else None
             
             # Validate inputs
             if not weights:
@@ -185,110 +267,253 @@ class BinPackingApp:
                 messagebox.showerror("Error", "Minimum items per bin must be positive")
                 return
             
-            # Solve the problem
-            result = solve_bin_packing(weights, bin_capacity, objective, min_items)
-            
-            # Display text results
-            self.results_text.delete(1.0, tk.END)
-            
-            if result is None:
-                self.results_text.insert(tk.END, "No solution found. Try adjusting parameters.")
+            overweight = [str(w) for w in weights if w > bin_capacity]
+            if overweight:
+                messagebox.showerror("Error", f"Some items exceed bin capacity: {', '.join(overweight)}")
                 return
-            else:
-                self.results_text.insert(tk.END, f"Solution found with {len(result)} bins:\n\n")
-                
-                for bin_id, items in result.items():
-                    bin_weight = sum(weights[i] for i in items)
-                    items_str = ", ".join(str(i) for i in items)
-                    weights_str = ", ".join(str(weights[i]) for i in items)
-                    
-                    self.results_text.insert(tk.END, f"Bin {bin_id+1}:\n")
-                    self.results_text.insert(tk.END, f"  Item indices: {items_str}\n")
-                    self.results_text.insert(tk.END, f"  Item weights: {weights_str}\n")
-                    self.results_text.insert(tk.END, f"  Total weight: {bin_weight} / {bin_capacity}\n")
-                    self.results_text.insert(tk.END, f"  Fill rate: {bin_weight/bin_capacity*100:.1f}%\n\n")
             
-            # Display visualization
-            self.draw_bins(result, weights, bin_capacity)
+            # Solve the problem in a worker process and poll it from the Tk main loop
+            self.solve_config = config
+            self.best_result = None
+            self.solve_queue = multiprocessing.Queue()
+            self.solve_process = multiprocessing.Process(
+                target=solve_worker,
+                args=(self.solve_queue, weights, bin_capacity, objective, min_items, bin_count),
+                daemon=True
+            )
+            self.solve_process.start()
+            self.solve_start = time.time()
+            
+            self.solve_button.config(state=tk.DISABLED)
+            self.cancel_button.config(state=tk.NORMAL)
+            self.results_text.delete(1.0, tk.END)
+            self.results_text.insert(tk.END, "Solving...")
+            self.draw_bins({}, [], 1)
+            self.update_status()
+            self.root.after(POLL_INTERVAL_MS, self.poll_solver)
         
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {str(e)}")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
-    def draw_bins(self, bins, weights, bin_capacity):
-        # Clear canvas
-        self.canvas.delete("all")
+    def poll_solver(self):
+        """Collect incumbents and the final result from the solver process"""
+        if self.solve_process is None:
+            return  # Cancelled or finished
         
-        if not bins:
-            return
+        while True:
+            try:
+                message = self.solve_queue.get_nowait()
+            except queue.Empty:
+                break
             
-        # Define drawing parameters
-        bin_width = 100
-        bin_height = 300
-        bin_spacing = 40
-        margin = 50
-        
-        # Generate colors for items
-        colors = []
-        for _ in range(len(weights)):
-            r = random.randint(100, 240)
-            g = random.randint(100, 240)
-            b = random.randint(100, 240)
-            colors.append(f"#{r:02x}{g:02x}{b:02x}")
-        
-        # Draw each bin
-        for i, (bin_id, items) in enumerate(bins.items()):
-            x = margin + i * (bin_width + bin_spacing)
-            y = margin
+            result = message["result"]
+            if message["type"] == "incumbent":
+                self.offer_result(result)
+                continue
             
-            # Draw bin outline
-            self.canvas.create_rectangle(x, y, x + bin_width, y + bin_height, 
-                                        outline="black", width=2)
+            # Final result from the solver
+            if "error" in result:
+                if self.best_result is None:
+                    self.finish_solve(f"Failed after {time.time() - self.solve_start:.1f}s")
+                    self.results_text.delete(1.0, tk.END)
+                    self.results_text.insert(tk.END, "No solution found. Try adjusting parameters.")
+                    messagebox.showerror("Error", result["error"])
+                    return
+                self.finish_solve(f"Solver failed ({result['error']}); showing best solution found")
+                return
             
-            # Draw bin capacity label
-            self.canvas.create_text(x + bin_width//2, y - 20, 
-                                   text=f"Bin {bin_id+1}", 
-                                   font=("Arial", 10, "bold"))
+            self.offer_result(result)
+            self.finish_solve("Done")
+            return
+        
+        if not self.solve_process.is_alive() and self.solve_queue.empty():
+            self.finish_solve("Solver process exited unexpectedly")
+            return
+        
+        self.update_status()
+        self.root.after(POLL_INTERVAL_MS, self.poll_solver)
+    
+    def offer_result(self, result):
+        """Keep the result if it is better than the best one so far"""
+        if self.best_result is not None and self.solve_config["objective"] == 'min_bins':
+            if result["bin_count"] > self.best_result["bin_count"]:
+                return
+            if result["bin_count"] == self.best_result["bin_count"] and result.get("status") != "optimal":
+                return
+        
+        self.best_result = result
+        self.display_result(result)
+    
+    def lower_bound(self):
+        """Simple lower bound on the number of bins for min_bins"""
+        config = self.solve_config
+        return math.ceil(sum(config["weights"]) / config["bin_capacity"])
+    
+    def update_status(self, prefix="Solving"):
+        elapsed = time.time() - self.solve_start
+        status = f"{prefix} - elapsed {elapsed:.1f}s"
+        
+        if self.best_result is not None:
+            bins = self.best_result["bin_count"]
+            status += f" | bins: {bins}"
+            if self.best_result.get("status") == "optimal":
+                status += " | gap: 0.0%"
+            elif self.solve_config["objective"] == 'min_bins':
+                gap = (bins - self.lower_bound()) / bins
+                status += f" | gap: {gap:.1%}"
+            else:
+                status += " | gap: n/a"
+        
+        self.status_var.set(status)
+    
+    def cancel_solve(self):
+        """Stop the solver process and keep the best solution found so far"""
+        if self.solve_process is None:
+            return
+        
+        self.solve_process.terminate()
+        if self.best_result is None:
+            self.results_text.delete(1.0, tk.END)
+            self.results_text.insert(tk.END, "Cancelled before any solution was found.")
+        self.finish_solve("Cancelled")
+    
+    def finish_solve(self, prefix):
+        self.solve_process.join(timeout=1)
+        self.solve_process = None
+        self.solve_queue = None
+        self.solve_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_status(prefix)
+    
+    def on_close(self):
+        if self.solve_process is not None:
+            self.solve_process.terminate()
+        self.root.destroy()
+    
+    def display_result(self, result):
+        weights = self.solve_config["weights"]
+        bin_capacity = self.solve_config["bin_capacity"]
+        
+        # Display text results, built as one string so large results insert in a single call
+        status = result.get("status", "optimal")
+        lines = [f"Solution found with {result['bin_count']} bins ({status}):\n"]
+        
+        packed_bins = {}
+        for bin_data in result["bins"]:
+            bin_id = bin_data["bin_id"]
+            items = bin_data["items"]
+            packed_bins[bin_id] = items
+            bin_weight = bin_data["total_weight"]
+            items_str = ", ".join(str(i) for i in items)
+            weights_str = ", ".join(str(weights[i]) for i in items)
             
+            lines.append(f"Bin {bin_id+1}:")
+            lines.append(f"  Item indices: {items_str}")
+            lines.append(f"  Item weights: {weights_str}")
+            lines.append(f"  Total weight: {bin_weight} / {bin_capacity}")
+            lines.append(f"  Fill rate: {bin_weight/bin_capacity*100:.1f}%\n")
+        
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, "\n".join(lines))
+        
+        # Display visualization
+        self.draw_bins(packed_bins, weights, bin_capacity)
+    
+    def draw_bins(self, bins, weights, bin_capacity):
+        self.drawn_bins = list(bins.items())
+        self.drawn_weights = weights
+        self.drawn_capacity = bin_capacity
+        
+        # Resize canvas scrollregion to fit all bins; only the visible ones are drawn
+        total_width = BIN_MARGIN * 2 + len(bins) * (BIN_WIDTH + BIN_SPACING)
+        total_height = BIN_HEIGHT + BIN_MARGIN * 2
+        self.canvas.config(scrollregion=(0, 0, total_width, total_height))
+        self.canvas.xview_moveto(0)
+        self.render_visible_bins()
+    
+    def on_canvas_scroll(self, *args):
+        self.canvas.xview(*args)
+        self.render_visible_bins()
+    
+    def render_visible_bins(self):
+        """Draw only the bins that intersect the visible part of the canvas"""
+        self.canvas.delete("all")
+        
+        if not self.drawn_bins:
+            return
+        
+        # Visible range in canvas coordinates, widened by one bin on each side
+        left = self.canvas.canvasx(0)
+        right = left + self.canvas.winfo_width()
+        stride = BIN_WIDTH + BIN_SPACING
+        first = max(0, int((left - BIN_MARGIN) // stride) - 1)
+        last = min(len(self.drawn_bins) - 1, int((right - BIN_MARGIN) // stride) + 1)
+        
+        for i in range(first, last + 1):
+            bin_id, items = self.drawn_bins[i]
+            self.draw_bin(BIN_MARGIN + i * stride, BIN_MARGIN, bin_id, items)
+    
+    def draw_bin(self, x, y, bin_id, items):
+        weights = self.drawn_weights
+        bin_capacity = self.drawn_capacity
+        total_weight = sum(weights[i] for i in items)
+        fill_ratio = total_weight / bin_capacity
+        
+        # Draw bin outline
+        self.canvas.create_rectangle(x, y, x + BIN_WIDTH, y + BIN_HEIGHT, 
+                                    outline="black", width=2)
+        
+        # Draw bin capacity label
+        self.canvas.create_text(x + BIN_WIDTH//2, y - 20, 
+                               text=f"Bin {bin_id+1}", 
+                               font=("Arial", 10, "bold"))
+        
+        if fill_ratio * BIN_HEIGHT / len(items) < MIN_ITEM_HEIGHT:
+            # Items too small to see: draw one fill bar with an item-count summary
+            fill_height = fill_ratio * BIN_HEIGHT
+            self.canvas.create_rectangle(
+                x, y + BIN_HEIGHT - fill_height,
+                x + BIN_WIDTH, y + BIN_HEIGHT,
+                fill="#8fb8de", outline="black"
+            )
+            self.canvas.create_text(
+                x + BIN_WIDTH//2, y + BIN_HEIGHT - fill_height / 2,
+                text=f"{len(items)} items\n({total_weight})",
+                font=("Arial", 8), fill="black"
+            )
+        else:
             # Draw items in bin
             current_height = 0
             for item in items:
                 item_weight = weights[item]
-                item_height = (item_weight / bin_capacity) * bin_height
+                item_height = (item_weight / bin_capacity) * BIN_HEIGHT
                 
                 # Draw item rectangle
-                item_y = y + bin_height - current_height - item_height
+                item_y = y + BIN_HEIGHT - current_height - item_height
                 self.canvas.create_rectangle(
                     x, item_y,
-                    x + bin_width, y + bin_height - current_height,
-                    fill=colors[item], outline="black"
+                    x + BIN_WIDTH, y + BIN_HEIGHT - current_height,
+                    fill=item_color(item), outline="black"
                 )
                 
                 # Draw item label
                 if item_height > 20:  # Only show label if there's enough space
                     self.canvas.create_text(
-                        x + bin_width//2, item_y + item_height//2,
+                        x + BIN_WIDTH//2, item_y + item_height//2,
                         text=f"Item {item}\n({item_weight})",
                         font=("Arial", 8), fill="black"
                     )
                 
                 current_height += item_height
-            
-            # Draw fill level
-            total_weight = sum(weights[i] for i in items)
-            fill_ratio = total_weight / bin_capacity
-            fill_text = f"{fill_ratio:.1%}"
-            self.canvas.create_text(
-                x + bin_width//2, y + bin_height + 15,
-                text=f"Fill: {fill_text}",
-                font=("Arial", 9)
-            )
         
-        # Resize canvas scrollregion to fit all bins
-        total_width = margin * 2 + len(bins) * (bin_width + bin_spacing)
-        total_height = bin_height + margin * 2
-        self.canvas.config(scrollregion=(0, 0, total_width, total_height))
+        # Draw fill level
+        self.canvas.create_text(
+            x + BIN_WIDTH//2, y + BIN_HEIGHT + 15,
+            text=f"Fill: {fill_ratio:.1%}",
+            font=("Arial", 9)
+        )
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,277 @@
+import os
+import math
+import random
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from solver import pywraplp, format_bins, first_fit_decreasing
+
+# Share of iterations that draw the destroyed bins from the whole packing
+# rather than only from the least-filled bins
+GLOBAL_DESTROY_RATE = 0.3
+
+# The neighbourhood keeps widening after stalls, up to this many bins
+MAX_DESTROY_COUNT = 10
+
+def _packing_score(bins, order_weights):
+    """Score a packing so that lower is better.
+    The bin count dominates; ties are broken by the sum of squared bin weights,
+    which grows as weight is concentrated in fewer, fuller bins.
+    """
+    loads = [sum(order_weights[i] for i in items) for items in bins]
+    return (len(bins), -sum(load * load for load in loads))
+
+def _repack_exact(weights, bin_capacity, max_bins, min_items_per_bin, time_limit_ms):
+    """Repack a small set of items into at most max_bins bins with SCIP.
+    Uses as few bins as possible and pushes weight into the lower-numbered bins.
+
+    Returns:
+      - A list of bins (lists of indices into weights), or None if no solution was found.
+    """
+    solver = pywraplp.Solver.CreateSolver('SCIP')
+    if not solver:
+        return None
+
+    items = range(len(weights))
+    bins = range(max_bins)
+    x = {(i, j): solver.IntVar(0, 1, f'x_{i}_{j}') for i in items for j in bins}
+    y = {j: solver.IntVar(0, 1, f'y[{j}]') for j in bins}
+
+    # Each item must be assigned to exactly one bin
+    for i in items:
+        solver.Add(sum(x[i, j] for j in bins) == 1)
+
+    for j in bins:
+        # Bin capacity and minimum items, only for used bins
+        solver.Add(sum(x[i, j] * weights[i] for i in items) <= y[j] * bin_capacity)
+        if min_items_per_bin > 0:
+            solver.Add(sum(x[i, j] for i in items) >= y[j] * min_items_per_bin)
+        # Symmetry breaking: bin j can only be used if bin j-1 is used
+        if j > 0:
+            solver.Add(y[j-1] >= y[j])
+
+    # Fewer bins first, then as much weight as possible in the earlier bins
+    big_m = sum(weights) * max_bins + 1
+    solver.Minimize(big_m * solver.Sum([y[j] for j in bins]) - solver.Sum(
+        x[i, j] * weights[i] * (max_bins - j) for i in items for j in bins
+    ))
+
+    solver.SetTimeLimit(max(1, int(time_limit_ms)))
+    status = solver.Solve()
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return None
+
+    packed = []
+    for j in bins:
+        bin_items = [i for i in items if x[(i, j)].solution_value() > 0.5]
+        if bin_items:
+            packed.append(bin_items)
+    return packed
+
+def _choose_destroy_set(bins, order_weights, destroy_count, rng):
+    """Pick the bins to destroy: always the least-filled bin, plus a random
+    sample of the other bins among the 2 * destroy_count least-filled ones.
+    Some iterations sample from the whole packing instead, since once the
+    least-filled bins are all fairly full, only items from other bins can
+    free one of them."""
+    by_fill = sorted(range(len(bins)), key=lambda b: sum(order_weights[i] for i in bins[b]))
+    if rng.random() < GLOBAL_DESTROY_RATE:
+        pool = by_fill[1:]
+    else:
+        pool = by_fill[1:2 * destroy_count]
+    return [by_fill[0]] + rng.sample(pool, min(destroy_count - 1, len(pool)))
+
+def _lns_worker(worker_id, seed, order_weights, bin_capacity, min_items_per_bin,
+                destroy_count, lower_bound, deadline, start_time, shared, lock, trace):
+    """Run destroy-and-repack iterations until the deadline, or until the
+    packing reaches lower_bound bins and cannot improve further.
+    The incumbent is shared between workers through a manager dict: a worker
+    adopts the shared incumbent when it is better than its own, and publishes
+    its own solution when it beats the shared one.
+    """
+    rng = random.Random(seed)
+    with lock:
+        bins = [list(items) for items in shared['bins']]
+    score = _packing_score(bins, order_weights)
+    current_destroy = destroy_count
+    max_destroy = max(destroy_count, MAX_DESTROY_COUNT)
+    stalled = 0
+    iteration = 0
+
+    while time.time() < deadline and len(bins) > 1:
+        # Pick up improvements found by other workers
+        shared_score = tuple(shared['score'])
+        if shared_score < score:
+            with lock:
+                bins = [list(items) for items in shared['bins']]
+                score = tuple(shared['score'])
+
+        if score[0] <= lower_bound:
+            break
+        iteration += 1
+
+        # Destroy a few of the least-filled bins and repack their items exactly
+        destroyed = _choose_destroy_set(bins, order_weights, min(current_destroy, len(bins)), rng)
+        freed = [i for b in destroyed for i in bins[b]]
+        remaining_ms = (deadline - time.time()) * 1000
+        repacked = _repack_exact(
+            [order_weights[i] for i in freed],
+            bin_capacity,
+            len(destroyed),
+            min_items_per_bin,
+            min(remaining_ms, 1000)
+        )
+
+        candidate = None
+        if repacked is not None:
+            kept = [items for b, items in enumerate(bins) if b not in destroyed]
+            candidate = kept + [[freed[i] for i in items] for items in repacked]
+
+        if candidate is not None and _packing_score(candidate, order_weights) < score:
+            bins = candidate
+            score = _packing_score(bins, order_weights)
+            current_destroy = destroy_count
+            stalled = 0
+
+            # Publish the improvement if it beats the shared incumbent
+            with lock:
+                if score < tuple(shared['score']):
+                    shared['bins'] = bins
+                    shared['score'] = score
+                    trace.append({
+                        "iteration": iteration,
+                        "worker": worker_id,
+                        "elapsed": round(time.time() - start_time, 3),
+                        "bin_count": score[0],
+                        "sum_squared_weights": -score[1]
+                    })
+        else:
+            # Widen the neighbourhood after a sweep without improvement
+            stalled += 1
+            if stalled >= min(len(bins), 20):
+                current_destroy = min(current_destroy + 1, max_destroy, len(bins))
+                stalled = 0
+
+    return iteration
+
+def improve_solution(order_weights, bin_capacity, initial_bins, min_items_per_bin=1, time_limit=5,
+                     workers=None, seed=None, destroy_count=3, item_labels=None):
+    """Improves a bin packing with parallel large-neighbourhood search.
+    Each iteration destroys a few of the least-filled bins and repacks their
+    items with an exact SCIP sub-solver. Several workers run in a process pool
+    with different seeds and share the best packing found so far. The search
+    starts from the first-fit decreasing packing when that is better than
+    initial_bins, and stops early once the ceil(total / capacity) bound is met.
+    initial_bins: List of bins, each a list of item indices into order_weights
+        (e.g. the "items" of each bin returned by solve_bin_packing).
+    time_limit: Time budget for the whole search, in seconds.
+    workers: Number of worker processes (defaults to the CPU count, at most 4).
+    seed: Base random seed; worker k uses seed + k.
+    destroy_count: Number of bins destroyed per iteration.
+    item_labels: Optional labels for items (used for result reporting).
+
+    Returns:
+      - A dictionary in the same format as solve_bin_packing, plus the
+        improvement trace and search statistics.
+    """
+    # Validate inputs
+    if not order_weights:
+        return {"error": "No weights provided to pack"}
+
+    if bin_capacity <= 0:
+        return {"error": "Bin capacity must be positive"}
+
+    if not initial_bins:
+        return {"error": "An initial assignment is required"}
+
+    if destroy_count < 2:
+        return {"error": "At least 2 bins must be destroyed per iteration"}
+
+    assigned = sorted(i for items in initial_bins for i in items)
+    if assigned != list(range(len(order_weights))):
+        return {"error": "Initial assignment must place every item in exactly one bin"}
+
+    for items in initial_bins:
+        if sum(order_weights[i] for i in items) > bin_capacity:
+            return {"error": "Initial assignment exceeds bin capacity"}
+        if len(items) < min_items_per_bin:
+            return {"error": f"Initial assignment has a bin with fewer than {min_items_per_bin} items"}
+
+    if workers is None:
+        workers = min(os.cpu_count() or 1, 4)
+    if seed is None:
+        seed = random.randrange(2 ** 31)
+
+    initial_bins = [list(items) for items in initial_bins if items]
+    initial_score = _packing_score(initial_bins, order_weights)
+    start_time = time.time()
+    deadline = start_time + time_limit
+    lower_bound = max(1, math.ceil(sum(order_weights) / bin_capacity))
+
+    def trace_entry(worker, score):
+        return {
+            "iteration": 0,
+            "worker": worker,
+            "elapsed": round(time.time() - start_time, 3),
+            "bin_count": score[0],
+            "sum_squared_weights": -score[1]
+        }
+
+    best_bins = initial_bins
+    best_score = initial_score
+    improvement_trace = [trace_entry(None, initial_score)]
+
+    # A poor initial assignment would otherwise cost most of the time budget
+    ffd_bins = list(first_fit_decreasing(order_weights, bin_capacity).values())
+    ffd_score = _packing_score(ffd_bins, order_weights)
+    if ffd_score < best_score and all(len(items) >= min_items_per_bin for items in ffd_bins):
+        best_bins, best_score = ffd_bins, ffd_score
+        improvement_trace.append(trace_entry("ffd", ffd_score))
+
+    iterations = 0
+    if best_score[0] > lower_bound:
+        with multiprocessing.Manager() as manager:
+            shared = manager.dict(bins=best_bins, score=best_score)
+            lock = manager.Lock()
+            trace = manager.list(improvement_trace)
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        _lns_worker, k, seed + k, order_weights, bin_capacity, min_items_per_bin,
+                        destroy_count, lower_bound, deadline, start_time, shared, lock, trace
+                    )
+                    for k in range(workers)
+                ]
+                iterations = sum(future.result() for future in futures)
+
+            best_bins = list(shared['bins'])
+            improvement_trace = sorted(trace, key=lambda entry: entry["elapsed"])
+
+    # Fullest bins first, as the exact solver tends to report them
+    best_bins.sort(key=lambda items: -sum(order_weights[i] for i in items))
+    packed_bins = {bin_id: sorted(items) for bin_id, items in enumerate(best_bins)}
+
+    return {
+        "bins": format_bins(packed_bins, order_weights, bin_capacity, item_labels),
+        "bin_count": len(packed_bins),
+        "objective": "min_bins",
+        "initial_bin_count": len(initial_bins),
+        "lower_bound": lower_bound,
+        "improvement_trace": improvement_trace,
+        "iterations": iterations,
+        "workers": workers,
+        "seed": seed
+    }
+
+# Example usage
+if __name__ == "__main__":
+    order_weights = [10, 20, 30, 40, 50, 15, 25, 35]  # Example order weights
+    bin_capacity = 60  # Example bin capacity
+    initial_bins = [[i] for i in range(len(order_weights))]  # One item per bin
+    result = improve_solution(order_weights, bin_capacity, initial_bins, time_limit=2)
+    if result.get("error"):
+        print("Error:", result["error"])
+    else:
+        print("Improved Bins:", result)
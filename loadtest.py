@@ -0,0 +1,293 @@
+"""HTTP load generator for the bin packing web app.
+
+Starts web_app under gunicorn (or targets an already running server with
+--url), drives a configurable mix of API requests from concurrent clients,
+and writes throughput, latency percentiles and error rates per endpoint to JSON.
+
+Example:
+    python loadtest.py --workers 4 --worker-class gthread --threads 8 \\
+        --concurrency 16 --duration 60 --output results.json
+"""
+import os
+import sys
+import math
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+
+# Default request mix: relative weight of each endpoint
+DEFAULT_MIX = "solve=6,compare=1,save_config=1,load_configs=2"
+
+ENDPOINTS = {
+    'solve': ('POST', '/api/solve'),
+    'compare': ('POST', '/api/compare'),
+    'save_config': ('POST', '/api/save_config'),
+    'load_configs': ('GET', '/api/load_configs')
+}
+
+OBJECTIVES = ['min_bins', 'max_weight', 'max_items', 'balance_bins']
+
+def parse_mix(mix_str):
+    """Parse 'solve=6,compare=1' into a dict of endpoint weights"""
+    mix = {}
+    for part in mix_str.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def make_problem(rng, args):
+    """Generate a random problem in the format the web UI sends"""
+    item_count = rng.randint(args.min_items, args.max_items)
+    weights = [rng.randint(1, args.max_weight) for _ in range(item_count)]
+    objective = rng.choice(args.objectives)
+    problem = {
+        'weights': weights,
+        'item_labels': [],
+        'bin_capacity': args.bin_capacity,
+        'objective': objective,
+        'min_items_per_bin': 1,
+        'sort_method': 'none',
+        'bin_count': max(2, sum(weights) // args.bin_capacity + 1)
+    }
+    problem.update(args.extra)
+    return problem
+
+def send_request(base_url, endpoint, body, client_address, timeout):
+    """Send one request and return (status, latency in seconds)"""
+    method, path = ENDPOINTS[endpoint]
+    data = json.dumps(body).encode() if method == 'POST' else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header('Content-Type', 'application/json')
+    if client_address:
+        req.add_header('X-Loadtest-Client', client_address)
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = None  # Connection error or timeout
+    return status, time.perf_counter() - start
+
+def client_loop(client_index, base_url, mix, args, deadline, samples, lock):
+    """Closed-loop client: send a request, wait for the response, think, repeat"""
+    rng = random.Random(args.seed + client_index)
+    endpoints = list(mix)
+    weights = [mix[name] for name in endpoints]
+    # Each client gets its own address unless all load should come from one client
+    client_address = None if args.single_client else f"10.{client_index // 65536 % 256}.{client_index // 256 % 256}.{client_index % 256}"
+
+    while time.time() < deadline:
+        endpoint = rng.choices(endpoints, weights)[0]
+        body = make_problem(rng, args) if endpoint != 'load_configs' else None
+        status, latency = send_request(base_url, endpoint, body, client_address, args.request_timeout)
+        with lock:
+            samples.append((endpoint, status, latency))
+        if args.think_time:
+            time.sleep(rng.expovariate(1 / args.think_time))
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(samples, elapsed):
+    """Throughput, latency percentiles and error rate for a group of samples"""
+    latencies = sorted(latency for _, _, latency in samples)
+    statuses = {}
+    errors = 0
+    for _, status, _ in samples:
+        key = str(status) if status is not None else 'connection_error'
+        statuses[key] = statuses.get(key, 0) + 1
+        if status is None or status >= 400:
+            errors += 1
+
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed > 0 else 0,
+        'error_rate': round(errors / len(samples), 4) if samples else 0,
+        'status_counts': statuses,
+        'latency_ms': {
+            'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1]) if latencies else None
+        }
+    }
+
+def start_server(args, data_dir):
+    """Start web_app under gunicorn and return the process"""
+    command = [
+        sys.executable, '-m', 'gunicorn', 'web_app:app',
+        '--bind', f'127.0.0.1:{args.port}',
+        '--workers', str(args.workers),
+        '--worker-class', args.worker_class,
+        '--timeout', str(args.server_timeout)
+    ]
+    if args.threads:
+        command += ['--threads', str(args.threads)]
+
+    # Let the simulated clients identify themselves, so each gets its own rate-limit bucket
+    env = dict(os.environ, BINPACK_DATA_DIR=data_dir, BINPACK_LOADTEST_CLIENT_HEADER='1')
+    return subprocess.Popen(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL
+    )
+
+def wait_until_ready(base_url, timeout):
+    """Poll the server until it answers or the timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/api/load_configs', timeout=1):
+                return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+def run_load(base_url, mix, args):
+    """Run the load for the configured duration and return the report"""
+    samples = []
+    lock = threading.Lock()
+
+    # Warm up without recording, so worker start-up is not measured
+    warmup_deadline = time.time() + args.warmup
+    threads = [
+        threading.Thread(target=client_loop, args=(i, base_url, mix, args, warmup_deadline, [], lock), daemon=True)
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    start = time.time()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=client_loop, args=(i, base_url, mix, args, deadline, samples, lock), daemon=True)
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    return {
+        'overall': summarize(samples, elapsed),
+        'endpoints': {
+            endpoint: summarize([s for s in samples if s[0] == endpoint], elapsed)
+            for endpoint in mix
+        },
+        'elapsed_s': round(elapsed, 2)
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the bin packing web app.")
+    server = parser.add_argument_group('server')
+    server.add_argument('--url', help="Target an already running server instead of starting gunicorn")
+    server.add_argument('--port', type=int, default=5055, help="Port for the local gunicorn server")
+    server.add_argument('--workers', type=int, default=2, help="Gunicorn worker processes")
+    server.add_argument('--worker-class', default='sync', help="Gunicorn worker class (sync, gthread, gevent, ...)")
+    server.add_argument('--threads', type=int, default=0, help="Threads per worker (gthread)")
+    server.add_argument('--server-timeout', type=int, default=60, help="Gunicorn worker timeout in seconds")
+    server.add_argument('--startup-timeout', type=float, default=30, help="Seconds to wait for the server to start")
+
+    load = parser.add_argument_group('load')
+    load.add_argument('--mix', default=DEFAULT_MIX, help=f"Endpoint weights (default: {DEFAULT_MIX})")
+    load.add_argument('--concurrency', type=int, default=8, help="Concurrent clients")
+    load.add_argument('--duration', type=float, default=30, help="Measured duration in seconds")
+    load.add_argument('--warmup', type=float, default=3, help="Unmeasured warm-up in seconds")
+    load.add_argument('--think-time', type=float, default=0, help="Mean pause between a client's requests in seconds")
+    load.add_argument('--request-timeout', type=float, default=120, help="Client-side request timeout in seconds")
+    load.add_argument('--single-client', action='store_true', help="Send all load as one client (no X-Loadtest-Client header)")
+    load.add_argument('--seed', type=int, default=0, help="Random seed for the generated problems")
+
+    problem = parser.add_argument_group('problems')
+    problem.add_argument('--min-items', type=int, default=5, help="Minimum items per problem")
+    problem.add_argument('--max-items', type=int, default=30, help="Maximum items per problem")
+    problem.add_argument('--max-weight', type=int, default=50, help="Maximum item weight")
+    problem.add_argument('--bin-capacity', type=int, default=100, help="Bin capacity")
+    problem.add_argument('--objectives', default=','.join(OBJECTIVES), help="Comma-separated objectives to sample")
+    problem.add_argument('--extra', default='{}', help="JSON merged into every request body, e.g. '{\"improve\": true}'")
+
+    parser.add_argument('--output', help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument('--verbose', action='store_true', help="Show gunicorn output")
+
+    args = parser.parse_args(argv)
+    args.objectives = [o.strip() for o in args.objectives.split(',') if o.strip()]
+    args.extra = json.loads(args.extra)
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    server = None
+    data_dir = None
+    base_url = args.url.rstrip('/') if args.url else f'http://127.0.0.1:{args.port}'
+
+    try:
+        if not args.url:
+            data_dir = tempfile.mkdtemp(prefix='binpacking-loadtest-')
+            server = start_server(args, data_dir)
+            if not wait_until_ready(base_url, args.startup_timeout):
+                print("Error: server did not start", file=sys.stderr)
+                return 1
+
+        report = run_load(base_url, mix, args)
+        report['config'] = {
+            'url': args.url,
+            'workers': None if args.url else args.workers,
+            'worker_class': None if args.url else args.worker_class,
+            'threads': None if args.url else args.threads,
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'mix': mix,
+            'items': [args.min_items, args.max_items],
+            'objectives': args.objectives,
+            'extra': args.extra
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
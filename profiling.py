@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+
+# Only one request can be profiled at a time: cProfile and tracemalloc are
+# process-wide on recent Python versions
+profiling_lock = threading.Lock()
+
+def frame_name(frame):
+    """Name a stack frame as 'function (file:line)'"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval.
+    The samples are written as collapsed stacks ('a;b;c count' per line),
+    the input format of flamegraph.pl, speedscope and similar tools.
+    """
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class RequestProfiler:
+    """Profiles the code run inside a with-block on the current thread.
+    Collects a cProfile summary, tracemalloc peak memory and, when
+    flamegraph_path is given, a collapsed-stack file from a stack sampler.
+    """
+    def __init__(self, top=25, flamegraph_path=None, sample_interval=0.001):
+        self.top = top
+        self.flamegraph_path = flamegraph_path
+        self.sample_interval = sample_interval
+        self.profile = cProfile.Profile()
+        self.sampler = None
+        self.wall_time = None
+        self.memory = None
+
+    def __enter__(self):
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+        if self.flamegraph_path:
+            self.sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self.sampler.start()
+
+        self._start = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.disable()
+        self.wall_time = time.perf_counter() - self._start
+
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler.write_collapsed(self.flamegraph_path)
+
+        current, peak = tracemalloc.get_traced_memory()
+        self.memory = {"current_bytes": current, "peak_bytes": peak}
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return False
+
+    def top_functions(self):
+        """The top functions by cumulative time"""
+        stats = pstats.Stats(self.profile)
+        rows = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "total_time": round(total, 4),
+                "cumulative_time": round(cumulative, 4)
+            })
+        rows.sort(key=lambda row: row["cumulative_time"], reverse=True)
+        return rows[:self.top]
+
+    def report(self):
+        """Summary of the profile, for attaching to an API response"""
+        report = {
+            "wall_time": round(self.wall_time, 4),
+            "top_functions": self.top_functions(),
+            "memory": self.memory
+        }
+        if self.sampler is not None:
+            report["flamegraph"] = {
+                "path": self.flamegraph_path,
+                "samples": sum(self.sampler.stacks.values())
+            }
+        return report
@@ -1,6 +1,9 @@
 import sys
+import time
 import subprocess
 
+from constraints import build_units, conflict_neighbours, greedy_max_clique, lower_bound, dsatur_pack, validate_item_indices
+
 # Ensure ortools is installed
 try:
     from ortools.linear_solver import pywraplp
@@ -8,6 +11,19 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "ortools"])
     from ortools.linear_solver import pywraplp
 
+# Time limit for a single solve_bin_packing call
+SOLVER_TIME_LIMIT_MS = 10000
+
+# Readable names for solver statuses, used in solver statistics
+STATUS_NAMES = {
+    pywraplp.Solver.OPTIMAL: "optimal",
+    pywraplp.Solver.FEASIBLE: "feasible",
+    pywraplp.Solver.INFEASIBLE: "infeasible",
+    pywraplp.Solver.UNBOUNDED: "unbounded",
+    pywraplp.Solver.ABNORMAL: "abnormal",
+    pywraplp.Solver.NOT_SOLVED: "not_solved"
+}
+
 def create_data_model(order_weights, bin_capacity):
     """Create the data model for bin packing."""
     data = {}
@@ -17,7 +33,59 @@ def create_data_model(order_weights, bin_capacity):
     data['bin_capacity'] = bin_capacity
     return data
 
-def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_items_per_bin=1, bin_count=None, item_labels=None):
+def format_bins(packed_bins, order_weights, bin_capacity, item_labels=None):
+    """Format packed bins for the frontend.
+    packed_bins: Mapping of bin id to the list of item indices in that bin.
+    
+    Returns:
+      - A list of bin dictionaries with items, weights and fill ratio.
+    """
+    result_bins = []
+    for bin_id, items in packed_bins.items():
+        # Get item weights
+        item_weights = [order_weights[i] for i in items]
+        bin_weight = sum(item_weights)
+        fill_ratio = bin_weight / bin_capacity
+        
+        bin_data = {
+            "bin_id": bin_id,
+            "items": items,
+            "item_weights": item_weights,
+            "total_weight": bin_weight,
+            "capacity": bin_capacity,
+            "fill_ratio": fill_ratio
+        }
+        
+        # Add labels if available
+        if item_labels and len(item_labels) >= len(order_weights):
+            bin_data["item_labels"] = [item_labels[i] for i in items]
+            
+        result_bins.append(bin_data)
+    return result_bins
+
+def first_fit_decreasing(order_weights, bin_capacity):
+    """Pack items with the first-fit decreasing heuristic.
+    Fast, and uses at most 11/9 OPT + 6/9 bins, so it is a good starting
+    point while the exact solver is still running.
+    
+    Returns:
+      - A dictionary mapping bin id to the list of item indices in that bin.
+    """
+    packed_bins = {}
+    bin_loads = []
+    for i in sorted(range(len(order_weights)), key=lambda i: order_weights[i], reverse=True):
+        for j, load in enumerate(bin_loads):
+            if load + order_weights[i] <= bin_capacity:
+                packed_bins[j].append(i)
+                bin_loads[j] += order_weights[i]
+                break
+        else:
+            packed_bins[len(bin_loads)] = [i]
+            bin_loads.append(order_weights[i])
+    return packed_bins
+
+def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_items_per_bin=1, bin_count=None, item_labels=None, stats=None, time_limit_ms=SOLVER_TIME_LIMIT_MS,
+                      conflicts=None, affinity_groups=None):
     """Solves the bin packing problem using OR-Tools.
     objective: 
         - 'min_bins' to minimize the number of bins used
@@ -27,6 +95,11 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
     min_items_per_bin: Minimum number of items that must be in each used bin.
     bin_count: Number of bins to use (only for 'balance_bins' objective).
     item_labels: Optional labels for items (used for result reporting).
+    stats: Optional dictionary that is filled with solver statistics
+        (model size, build/solve/extraction times, SCIP iterations and nodes).
+    time_limit_ms: Solver time limit in milliseconds.
+    conflicts: Optional list of [i, j] item pairs that must go in different bins.
+    affinity_groups: Optional list of item index lists that must share a bin.
     
     Returns:
       - A dictionary with solution details including bins, bin_count, etc.
@@ -40,6 +113,10 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
 
     if objective == 'balance_bins' and (bin_count is None or bin_count < 2):
         return {"error": "For balanced bins, you must specify at least 2 bins"}
+
+    constraint_error = validate_item_indices(len(order_weights), conflicts, affinity_groups)
+    if constraint_error:
+        return {"error": constraint_error}
         
     # Handle edge case where number of items is less than min_items_per_bin
     if len(order_weights) < min_items_per_bin:
@@ -72,7 +149,67 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
         if total_items < bin_count:
             return {"error": f"Not enough items ({total_items}) to distribute across {bin_count} bins"}
     
-    data = create_data_model(order_weights, bin_capacity)
+    build_start = time.perf_counter()
+    
+    # Merge affinity groups into super-items ("units"); without constraints
+    # every item is a unit of its own and the model below is unchanged
+    units = build_units(order_weights, conflicts, affinity_groups)
+    if "error" in units:
+        return units
+    heavy_groups = [members for members, w in zip(units['members'], units['weights']) if w > bin_capacity]
+    if heavy_groups:
+        return {"error": f"Affinity groups exceed bin capacity: {heavy_groups}"}
+    
+    # Conflict graph preprocessing: a clique of conflicting units needs one bin per unit
+    neighbours = conflict_neighbours(len(units['weights']), units['conflicts'])
+    clique = greedy_max_clique(neighbours)
+    if objective == 'balance_bins':
+        if len(units['weights']) < bin_count:
+            return {"error": f"Only {len(units['weights'])} affinity groups to distribute across {bin_count} bins"}
+        if len(clique) > bin_count:
+            return {"error": f"{len(clique)} mutually conflicting items cannot fit in {bin_count} bins"}
+    
+    data = create_data_model(units['weights'], bin_capacity)
+    data['sizes'] = units['sizes']
+    
+    preprocessing = None
+    heuristic_packing = None
+    if objective == 'min_bins':
+        # The heuristic gives an upper bound on the bins needed; if it meets the
+        # lower bound it is optimal and the MIP is skipped. Its bins only count
+        # as a bound if they also satisfy min_items_per_bin.
+        bound = lower_bound(units['weights'], bin_capacity, clique)
+        heuristic_bins = dsatur_pack(units['weights'], bin_capacity, neighbours)
+        heuristic_valid = all(sum(data['sizes'][u] for u in b) >= min_items_per_bin for b in heuristic_bins)
+        preprocessing = {
+            "units": len(units['weights']),
+            "max_clique": len(clique),
+            "lower_bound": bound,
+            "heuristic_bins": len(heuristic_bins) if heuristic_valid else None
+        }
+        if heuristic_valid:
+            heuristic_packing = {j: sorted(i for u in b for i in units['members'][u]) for j, b in enumerate(heuristic_bins)}
+            if len(heuristic_bins) <= bound:
+                if stats is not None:
+                    stats.update({
+                        "variables": 0,
+                        "constraints": 0,
+                        "build_time": round(time.perf_counter() - build_start, 4),
+                        "solve_time": 0,
+                        "status": "optimal",
+                        "presolved": True
+                    })
+                result = {
+                    "bins": format_bins(heuristic_packing, order_weights, bin_capacity, item_labels),
+                    "bin_count": len(heuristic_packing),
+                    "objective": objective,
+                    "status": "optimal"
+                }
+                if conflicts or affinity_groups:
+                    result["preprocessing"] = preprocessing
+                return result
+            # n x UB assignment variables instead of n x n
+            data['bins'] = list(range(len(heuristic_bins)))
     
     # Create the solver
     solver = pywraplp.Solver.CreateSolver('SCIP')
@@ -96,7 +233,7 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
     item_count = {}
     if objective in ['max_items', 'balance_bins']:
         for j in data['bins']:
-            item_count[j] = solver.IntVar(0, len(data['items']), f'items_{j}')
+            item_count[j] = solver.IntVar(0, len(order_weights), f'items_{j}')
     
     # For balance_bins, we need variables to track deviations from average
     deviation_vars = {}
@@ -117,13 +254,25 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
     for i in data['items']:
         solver.Add(sum(x[i, j] for j in data['bins']) == 1)
     
+    # Conflicting units cannot share a bin
+    for a, b in units['conflicts']:
+        for j in data['bins']:
+            solver.Add(x[a, j] + x[b, j] <= y[j])
+    
+    # Symmetry breaking for min_bins, where bins are interchangeable: the
+    # units of the clique go into distinct bins, so fix them to the first ones
+    if objective == 'min_bins':
+        for j, unit in enumerate(clique):
+            solver.Add(x[unit, j] == 1)
+        solver.Add(solver.Sum([y[j] for j in data['bins']]) >= preprocessing['lower_bound'])
+    
     for j in data['bins']:
         # Calculate bin fill for each bin
         solver.Add(bin_fill[j] == solver.Sum(x[i, j] * data['weights'][i] for i in data['items']))
         
         # For max_items and balance_bins, calculate item count for each bin
         if objective in ['max_items', 'balance_bins']:
-            solver.Add(item_count[j] == solver.Sum(x[i, j] for i in data['items']))
+            solver.Add(item_count[j] == solver.Sum(x[i, j] * data['sizes'][i] for i in data['items']))
         
         # Bin capacity constraint
         solver.Add(
@@ -132,7 +281,7 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
         
         # Only apply min_items constraint if bin is used
         if min_items_per_bin > 0:
-            solver.Add(sum(x[i, j] for i in data['items']) >= y[j] * min_items_per_bin)
+            solver.Add(sum(x[i, j] * data['sizes'][i] for i in data['items']) >= y[j] * min_items_per_bin)
     
     # Additional constraints based on objective
     if objective in ['max_weight', 'max_items']:
@@ -215,14 +364,28 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
         # Minimize total deviation across all bins
         solver.Minimize(solver.Sum([deviation_vars[j] for j in range(active_bins)]))
     
-    # Time limit for solving (10 seconds)
-    solver.SetTimeLimit(10000)  # milliseconds
+    # Time limit for solving
+    solver.SetTimeLimit(time_limit_ms)
     
     # Solve the problem
+    solve_start = time.perf_counter()
     status = solver.Solve()
+    solve_end = time.perf_counter()
+    
+    if stats is not None:
+        stats.update({
+            "variables": solver.NumVariables(),
+            "constraints": solver.NumConstraints(),
+            "build_time": round(solve_start - build_start, 4),
+            "solve_time": round(solve_end - solve_start, 4),
+            "solver_wall_time_ms": solver.WallTime(),
+            "iterations": solver.iterations(),
+            "nodes": solver.nodes(),
+            "status": STATUS_NAMES.get(status, "unknown")
+        })
     
     # Process results
-    if status == pywraplp.Solver.OPTIMAL:
+    if status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
         # Get items in each bin
         packed_bins = {}
         for j in data['bins']:
@@ -230,39 +393,27 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
                 bin_items = []
                 for i in data['items']:
                     if x[(i, j)].solution_value() > 0.5:
-                        bin_items.append(i)
+                        bin_items.extend(units['members'][i])
+                bin_items.sort()
                 if bin_items:  # Only include non-empty bins
                     packed_bins[j] = bin_items
-                    
-        # Format the result for the frontend
-        result_bins = []
-        for bin_id, items in packed_bins.items():
-            # Get item weights
-            item_weights = [order_weights[i] for i in items]
-            bin_weight = sum(item_weights)
-            fill_ratio = bin_weight / bin_capacity
-            
-            bin_data = {
-                "bin_id": bin_id,
-                "items": items,
-                "item_weights": item_weights,
-                "total_weight": bin_weight,
-                "capacity": bin_capacity,
-                "fill_ratio": fill_ratio
-            }
-            
-            # Add labels if available
-            if item_labels and len(item_labels) >= len(order_weights):
-                bin_data["item_labels"] = [item_labels[i] for i in items]
-                
-            result_bins.append(bin_data)
         
+        if stats is not None:
+            stats["extract_time"] = round(time.perf_counter() - solve_end, 4)
+                    
         # Create the final result dictionary
         result = {
-            "bins": result_bins,
+            "bins": format_bins(packed_bins, order_weights, bin_capacity, item_labels),
             "bin_count": len(packed_bins),
-            "objective": objective
+            "objective": objective,
+            "status": "optimal" if status == pywraplp.Solver.OPTIMAL else "feasible"
         }
+        if preprocessing and (conflicts or affinity_groups):
+            result["preprocessing"] = preprocessing
+        
+        # A feasible (non-optimal) solution means the time limit was hit first
+        if status == pywraplp.Solver.FEASIBLE:
+            result["warning"] = "Time limit reached; the best solution found so far is shown and may not be optimal"
         
         # Add warning if relevant
         if objective == 'balance_bins' and bin_count > 1:
@@ -276,13 +427,26 @@ def solve_bin_packing(order_weights, bin_capacity, objective='min_bins', min_ite
         
         return result
     else:
+        # The model only has the heuristic's bins, so its packing is still a valid answer
+        if heuristic_packing is not None:
+            result = {
+                "bins": format_bins(heuristic_packing, order_weights, bin_capacity, item_labels),
+                "bin_count": len(heuristic_packing),
+                "objective": objective,
+                "status": "feasible",
+                "warning": "The solver found no packing within the time limit; the heuristic packing is shown and may not be optimal"
+            }
+            if conflicts or affinity_groups:
+                result["preprocessing"] = preprocessing
+            return result
+        
         # No feasible solution found
         if status == pywraplp.Solver.INFEASIBLE:
             return {"error": "No feasible solution exists with these constraints"}
         elif status == pywraplp.Solver.UNBOUNDED:
             return {"error": "The problem is unbounded. Check your objective function."}
         elif status == pywraplp.Solver.NOT_SOLVED:
-            if solver.WallTime() >= 10000:
+            if solver.WallTime() >= time_limit_ms:
                 return {"error": "Time limit exceeded. Try simplifying the problem or adjusting parameters."}
             else:
                 return {"error": "The problem could not be solved. Please check your inputs."}
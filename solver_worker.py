@@ -0,0 +1,150 @@
+"""Solver worker for the work queue.
+
+Pulls jobs from a work_queue.py broker, runs them in a pool of solver
+processes and reports the results. Start one per host, with --slots set to
+the number of solves the host should run at once (default: all cores); start
+more hosts to add capacity.
+
+A job is {"engine": name, "kwargs": {...}, "stats": bool}. The engines are
+"solve" (solve_bin_packing), "improve" (lns.improve_solution) and
+"heuristic" (constraints.pack_heuristic). Improve jobs start their own
+search processes; their count is capped so that all slots together use at
+most the host's cores, whatever the front end asked for.
+
+Example:
+    python solver_worker.py --broker queue-host:7070 --slots 4
+"""
+import os
+import sys
+import socket
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from work_queue import QueueClient, QueueError, HEARTBEAT_INTERVAL
+
+def run_job(job, max_search_workers=None):
+    """Run one job in a solver process.
+    max_search_workers: Upper bound on the worker processes of an improve job.
+
+    Returns:
+      - {"result": ...}, plus {"stats": ...} for solve jobs that asked for statistics.
+    """
+    engine = job['engine']
+    kwargs = job.get('kwargs', {})
+
+    if engine == 'solve':
+        from solver import solve_bin_packing
+        stats = {} if job.get('stats') else None
+        reply = {'result': solve_bin_packing(stats=stats, **kwargs)}
+        if stats is not None:
+            reply['stats'] = stats
+        return reply
+    if engine == 'improve':
+        from lns import improve_solution
+        if max_search_workers is not None:
+            kwargs = dict(kwargs, workers=min(kwargs.get('workers') or max_search_workers, max_search_workers))
+        return {'result': improve_solution(**kwargs)}
+    if engine == 'heuristic':
+        from constraints import pack_heuristic
+        packed_bins = pack_heuristic(**kwargs)
+        # JSON object keys are strings; send the bins as a list
+        return {'result': packed_bins if 'error' in packed_bins else {'bins': list(packed_bins.values())}}
+    return {'result': {'error': f"Unknown engine {engine!r}"}}
+
+class SolverWorker:
+    """Fetches jobs with one thread per slot and runs them in a process pool.
+    A separate thread sends heartbeats, so long solves do not look like a dead worker.
+    """
+    def __init__(self, broker, slots, worker_id=None):
+        self.client = QueueClient(broker)
+        self.slots = slots
+        # Share the cores between the slots, as every slot may run an improve job
+        self.search_workers = max(1, (os.cpu_count() or 1) // slots)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.pool = ProcessPoolExecutor(max_workers=slots)
+        self._pool_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self):
+        threads = [threading.Thread(target=self._heartbeat_loop, daemon=True)]
+        threads += [threading.Thread(target=self._slot_loop, daemon=True) for _ in range(self.slots)]
+        for thread in threads:
+            thread.start()
+        print(f"Solver worker {self.worker_id} with {self.slots} slots, broker {self.client.address[0]}:{self.client.address[1]}",
+              file=sys.stderr)
+        try:
+            while not self._stop.wait(1):
+                pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                self.client.request({'op': 'heartbeat', 'worker_id': self.worker_id}, timeout=HEARTBEAT_INTERVAL)
+            except QueueError:
+                pass  # The fetch loops report an unreachable broker
+
+    def _slot_loop(self):
+        while not self._stop.is_set():
+            try:
+                reply = self.client.request({'op': 'fetch', 'worker_id': self.worker_id, 'wait': 5}, timeout=30)
+            except QueueError as e:
+                print(f"Error: {e}; retrying", file=sys.stderr)
+                self._stop.wait(HEARTBEAT_INTERVAL)
+                continue
+            if reply.get('job_id') is None:
+                continue
+
+            job_id = reply['job_id']
+            pool = self.pool
+            try:
+                outcome = pool.submit(run_job, reply['job'], self.search_workers).result()
+            except BrokenProcessPool:
+                # A solver process died (e.g. out of memory): let another worker retry the job
+                self._report({'op': 'fail', 'worker_id': self.worker_id, 'job_id': job_id,
+                              'error': 'Solver process crashed'})
+                with self._pool_lock:
+                    if self.pool is pool:  # Other slots may have replaced it already
+                        self.pool = ProcessPoolExecutor(max_workers=self.slots)
+                continue
+            except Exception as e:
+                outcome = {'result': {'error': f"Solver error: {e}"}}
+
+            self._report({'op': 'complete', 'worker_id': self.worker_id, 'job_id': job_id, 'result': outcome})
+
+    def _report(self, message):
+        """Send a result, retrying while the broker is unreachable"""
+        while not self._stop.is_set():
+            try:
+                self.client.request(message, timeout=30)
+                return
+            except QueueError as e:
+                print(f"Error: {e}; retrying", file=sys.stderr)
+                self._stop.wait(HEARTBEAT_INTERVAL)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run bin packing jobs from a work queue broker.")
+    parser.add_argument('--broker', default=os.environ.get('BINPACK_BROKER', '127.0.0.1:7070'),
+                        help="Broker address host:port (default: $BINPACK_BROKER or 127.0.0.1:7070)")
+    parser.add_argument('--slots', type=int, default=os.cpu_count() or 1, help="Concurrent solves (default: all cores)")
+    parser.add_argument('--worker-id', help="Name reported to the broker (default: hostname-pid)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    worker = SolverWorker(args.broker, args.slots, args.worker_id)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
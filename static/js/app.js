@@ -1,3 +1,18 @@
+// Canvas bin rendering settings
+const BIN_CANVAS = {
+    minItemHeight: 3,         // Items thinner than this (px) are aggregated into a fill bar
+    labelHeight: 24,
+    fillInfoHeight: 22,
+    cellPadding: 20,
+    maxViewportHeight: 640    // Taller visualizations scroll inside the viewport
+};
+
+// Number of bins per page in the detailed results
+const DETAIL_PAGE_SIZE = 50;
+
+// Bin canvases currently on the page, redrawn on resize and theme change
+const activeBinCanvases = [];
+
 document.addEventListener('DOMContentLoaded', function() {
     // Form elements
     const form = document.getElementById('binPackingForm');
@@ -66,6 +81,9 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Save preference to localStorage
         localStorage.setItem('theme', newTheme);
+        
+        // Canvas colors come from the theme's CSS variables
+        redrawBinCanvases();
     });
     
     // Check for saved theme preference
@@ -161,6 +179,7 @@ document.addEventListener('DOMContentLoaded', function() {
     closeComparisonBtn.addEventListener('click', function() {
         document.getElementById('comparisonCard').style.display = 'none';
         document.getElementById('resultsCard').style.display = 'block';
+        redrawBinCanvases();
     });
     
     // Helper function to get form data
@@ -395,50 +414,14 @@ function displayComparison(result, data) {
         const strategyContent = document.createElement('div');
         strategyContent.className = 'accordion-body';
         
-        // Add visualization using a grid layout
+        // Add visualization rendered to a single canvas
         const vizContainer = document.createElement('div');
         vizContainer.className = 'strategy-visualization';
+        const binCanvas = createBinCanvas(vizContainer, strategyResult.bins);
         
-        // Determine bins per row
-        const screenWidth = window.innerWidth;
-        const binsPerRow = screenWidth < 576 ? 3 : 
-                          screenWidth < 768 ? 4 : 
-                          screenWidth < 992 ? 5 : 6;
-        
-        // Create a grid of rows and columns
-        let currentRow = null;
-        let binsInCurrentRow = 0;
-        
-        strategyResult.bins.forEach((bin, index) => {
-            // Create a new row if needed
-            if (index % binsPerRow === 0) {
-                currentRow = document.createElement('div');
-                currentRow.className = 'row justify-content-center mb-3';
-                vizContainer.appendChild(currentRow);
-                binsInCurrentRow = 0;
-            }
-            
-            // Create a column for this bin
-            const binColumn = document.createElement('div');
-            const colWidth = Math.max(12 / binsPerRow, 3); // At least col-3
-            binColumn.className = `col-${colWidth} col-sm-${colWidth} text-center`;
-            
-            // Create bin visualization
-            const binContainer = createBinVisualization(bin, data);
-            
-            binColumn.appendChild(binContainer);
-            currentRow.appendChild(binColumn);
-            binsInCurrentRow++;
-            
-            // If we're at the last bin, add spacer columns if needed
-            if (index === strategyResult.bins.length - 1 && binsInCurrentRow < binsPerRow) {
-                const remainingCols = binsPerRow - binsInCurrentRow;
-                for (let i = 0; i < remainingCols; i++) {
-                    const spacerCol = document.createElement('div');
-                    spacerCol.className = `col-${colWidth} col-sm-${colWidth}`;
-                    currentRow.appendChild(spacerCol);
-                }
-            }
+        // Collapsed sections have no width yet, so draw once they are shown
+        strategyBody.addEventListener('shown.bs.collapse', function() {
+            binCanvas.draw();
         });
         
         strategyContent.appendChild(vizContainer);
@@ -452,11 +435,8 @@ function displayComparison(result, data) {
     visualizationContainer.appendChild(accordion);
     comparisonResults.appendChild(visualizationContainer);
     
-    // Initialize tooltips
-    const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
-    tooltipTriggerList.map(function (tooltipTriggerEl) {
-        return new bootstrap.Tooltip(tooltipTriggerEl);
-    });
+    // Draw the canvases that are already visible
+    redrawBinCanvases();
 }
 
 // Display results
@@ -497,113 +477,14 @@ function displayResults(result, data) {
         resultsSummary.appendChild(warningDiv);
     }
     
-    // Display visualization - create a grid layout of bins
+    // Display visualization - all bins are rendered to a single canvas
     visualization.innerHTML = '';
     
     // Responsive design - adjust item display based on screen size
     const isMobile = window.innerWidth < 576;
     
-    // Determine how many bins to display per row based on screen width
-    const screenWidth = window.innerWidth;
-    const binsPerRow = screenWidth < 576 ? 3 : 
-                       screenWidth < 768 ? 4 : 
-                       screenWidth < 992 ? 5 : 6;
-    
-    // Create a container for each row
-    let currentRow = null;
-    let binsInCurrentRow = 0;
-    
-    result.bins.forEach((bin, index) => {
-        // Create a new row if needed
-        if (index % binsPerRow === 0) {
-            currentRow = document.createElement('div');
-            currentRow.className = 'row justify-content-center mb-3';
-            visualization.appendChild(currentRow);
-            binsInCurrentRow = 0;
-        }
-        
-        // Create a column for this bin
-        const binColumn = document.createElement('div');
-        const colWidth = Math.max(12 / binsPerRow, 3); // Ensure column is at least col-3
-        binColumn.className = `col-${colWidth} col-sm-${colWidth} text-center`;
-        
-        // Create bin container
-        const binContainer = document.createElement('div');
-        binContainer.className = 'bin-container';
-        
-        const binLabel = document.createElement('div');
-        binLabel.className = 'bin-label';
-        binLabel.textContent = `Bin ${bin.bin_id + 1}`;
-        
-        const binDiv = document.createElement('div');
-        binDiv.className = 'bin';
-        
-        // Add items to bin
-        let currentHeight = 0;
-        bin.items.forEach((item, index) => {
-            const itemWeight = bin.item_weights[index];
-            const itemHeight = (itemWeight / bin.capacity) * 100; // As percentage of bin height
-            
-            const itemDiv = document.createElement('div');
-            itemDiv.className = 'item';
-            // Position from bottom of container
-            itemDiv.style.height = `${itemHeight}%`;
-            itemDiv.style.bottom = `${currentHeight}%`;
-            itemDiv.style.backgroundColor = getRandomColor(item);
-            
-            // Display label or weight
-            let itemText = itemWeight;
-            if (bin.item_labels && bin.item_labels[index]) {
-                // If we have labels, use them for tooltips
-                itemDiv.setAttribute('data-bs-toggle', 'tooltip');
-                itemDiv.setAttribute('data-bs-placement', 'top');
-                itemDiv.setAttribute('title', `${bin.item_labels[index]}: ${itemWeight}`);
-                
-                // On mobile or for small items, still just show weight
-                if (!isMobile && itemHeight > 15) {
-                    itemText = bin.item_labels[index];
-                }
-            }
-            
-            // On mobile, only show text for larger items
-            if (!isMobile || itemHeight > 10) {
-                itemDiv.textContent = itemText;
-            }
-            
-            binDiv.appendChild(itemDiv);
-            currentHeight += itemHeight;
-        });
-        
-        // Add fill rate label
-        const fillRateDiv = document.createElement('div');
-        fillRateDiv.className = 'fill-info';
-        const fillRate = (bin.total_weight / bin.capacity) * 100;
-        fillRateDiv.textContent = `${fillRate.toFixed(0)}% full`;
-        
-        binContainer.appendChild(binLabel);
-        binContainer.appendChild(binDiv);
-        binContainer.appendChild(fillRateDiv);
-        
-        binColumn.appendChild(binContainer);
-        currentRow.appendChild(binColumn);
-        binsInCurrentRow++;
-        
-        // If we have empty columns in the last row, add spacer columns
-        if (index === result.bins.length - 1 && binsInCurrentRow < binsPerRow) {
-            const remainingCols = binsPerRow - binsInCurrentRow;
-            for (let i = 0; i < remainingCols; i++) {
-                const spacerCol = document.createElement('div');
-                spacerCol.className = `col-${colWidth} col-sm-${colWidth}`;
-                currentRow.appendChild(spacerCol);
-            }
-        }
-    });
-    
-    // Initialize tooltips
-    const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
-    tooltipTriggerList.map(function (tooltipTriggerEl) {
-        return new bootstrap.Tooltip(tooltipTriggerEl);
-    });
+    createBinCanvas(visualization, result.bins);
+    redrawBinCanvases();
     
     // Scroll to results on mobile
     if (isMobile) {
@@ -617,58 +498,85 @@ function displayResults(result, data) {
     displayDetailedResults(result.bins, detailedResults);
 }
 
-// Display detailed results in table format
+// Display detailed results in table format, a page of bins at a time
 function displayDetailedResults(bins, container) {
     container.innerHTML = '';
     
-    bins.forEach(bin => {
-        const binHeader = document.createElement('h6');
-        binHeader.className = 'mt-3';
-        binHeader.textContent = `Bin ${bin.bin_id + 1}`;
-        
-        const table = document.createElement('table');
-        table.className = 'table table-sm table-striped';
-        
-        const tableHead = document.createElement('thead');
-        tableHead.innerHTML = `
-            <tr>
-                <th>Item</th>
-                <th>Weight</th>
-            </tr>
-        `;
-        
-        const tableBody = document.createElement('tbody');
-        
-        bin.items.forEach((item, index) => {
-            const row = document.createElement('tr');
-            
-            // Use label if available, otherwise use item index
-            const itemName = bin.item_labels && bin.item_labels[index] 
-                ? bin.item_labels[index] 
-                : `Item ${item}`;
-            
-            row.innerHTML = `
-                <td>${itemName}</td>
-                <td>${bin.item_weights[index]}</td>
-            `;
-            tableBody.appendChild(row);
+    let shown = 0;
+    const moreButton = document.createElement('button');
+    moreButton.type = 'button';
+    moreButton.className = 'btn btn-sm btn-outline-secondary mt-2';
+    
+    function showNextPage() {
+        const page = bins.slice(shown, shown + DETAIL_PAGE_SIZE);
+        page.forEach(bin => {
+            container.insertBefore(createBinTable(bin), moreButton);
         });
+        shown += page.length;
         
-        // Summary row
-        const summaryRow = document.createElement('tr');
-        summaryRow.className = 'table-active';
-        summaryRow.innerHTML = `
-            <td><strong>Total</strong></td>
-            <td><strong>${bin.total_weight} / ${bin.capacity} (${((bin.total_weight / bin.capacity) * 100).toFixed(0)}%)</strong></td>
-        `;
+        if (shown < bins.length) {
+            moreButton.textContent = `Show more bins (${bins.length - shown} remaining)`;
+        } else {
+            moreButton.remove();
+        }
+    }
+    
+    moreButton.addEventListener('click', showNextPage);
+    container.appendChild(moreButton);
+    showNextPage();
+}
+
+// Create the detail table for a single bin
+function createBinTable(bin) {
+    const binSection = document.createElement('div');
+    
+    const binHeader = document.createElement('h6');
+    binHeader.className = 'mt-3';
+    binHeader.textContent = `Bin ${bin.bin_id + 1}`;
+    
+    const table = document.createElement('table');
+    table.className = 'table table-sm table-striped';
+    
+    const tableHead = document.createElement('thead');
+    tableHead.innerHTML = `
+        <tr>
+            <th>Item</th>
+            <th>Weight</th>
+        </tr>
+    `;
+    
+    const tableBody = document.createElement('tbody');
+    
+    bin.items.forEach((item, index) => {
+        const row = document.createElement('tr');
         
-        tableBody.appendChild(summaryRow);
-        table.appendChild(tableHead);
-        table.appendChild(tableBody);
+        // Use label if available, otherwise use item index
+        const itemName = bin.item_labels && bin.item_labels[index] 
+            ? bin.item_labels[index] 
+            : `Item ${item}`;
         
-        container.appendChild(binHeader);
-        container.appendChild(table);
+        row.innerHTML = `
+            <td>${itemName}</td>
+            <td>${bin.item_weights[index]}</td>
+        `;
+        tableBody.appendChild(row);
     });
+    
+    // Summary row
+    const summaryRow = document.createElement('tr');
+    summaryRow.className = 'table-active';
+    summaryRow.innerHTML = `
+        <td><strong>Total</strong></td>
+        <td><strong>${bin.total_weight} / ${bin.capacity} (${((bin.total_weight / bin.capacity) * 100).toFixed(0)}%)</strong></td>
+    `;
+    
+    tableBody.appendChild(summaryRow);
+    table.appendChild(tableHead);
+    table.appendChild(tableBody);
+    
+    binSection.appendChild(binHeader);
+    binSection.appendChild(table);
+    return binSection;
 }
 
 // Save configuration
@@ -804,84 +712,230 @@ function getRandomColor(seed) {
     return `hsl(${hue}, 70%, 60%)`;
 }
 
-// Check for viewport changes to refresh display
+// Redraw bin canvases when the viewport changes
 window.addEventListener('resize', function() {
-    const resultsCard = document.getElementById('resultsCard');
-    const comparisonCard = document.getElementById('comparisonCard');
-    
-    // Refresh results if displayed
-    if (resultsCard.style.display !== 'none') {
-        // If we have results displayed, we might want to refresh the visualization
-        // However, for simplicity we'll skip full re-rendering in the resize handler
-    }
-    
-    // Refresh comparison if displayed
-    if (comparisonCard.style.display !== 'none') {
-        // Similar to above, we could refresh the comparison visualization
-    }
+    redrawBinCanvases();
 }, { passive: true });
 
-// Create bin visualization for comparison view
-function createBinVisualization(bin, data) {
-    // Create container for the bin
-    const binContainer = document.createElement('div');
-    binContainer.className = 'bin-container';
-    
-    const binLabel = document.createElement('div');
-    binLabel.className = 'bin-label';
-    binLabel.textContent = `Bin ${bin.bin_id + 1}`;
+// Render bins to a single canvas inside a scrollable viewport.
+// Only the rows of bins that are scrolled into view are drawn, and bins whose
+// items would be too thin to see are drawn as one fill bar with an item count.
+function createBinCanvas(container, bins) {
+    const viewport = document.createElement('div');
+    viewport.className = 'bin-canvas-viewport';
+    
+    const canvas = document.createElement('canvas');
+    canvas.className = 'bin-canvas';
+    
+    // Spacer gives the viewport the scroll height of all rows
+    const spacer = document.createElement('div');
+    
+    viewport.appendChild(canvas);
+    viewport.appendChild(spacer);
+    container.appendChild(viewport);
+    
+    let layout = null;
+    let drawPending = false;
+    
+    function computeLayout() {
+        const isMobile = window.innerWidth < 576;
+        const binWidth = isMobile ? 80 : 120;
+        const binHeight = isMobile ? 160 : 240;
+        const cellWidth = binWidth + BIN_CANVAS.cellPadding;
+        const cellHeight = binHeight + BIN_CANVAS.labelHeight + BIN_CANVAS.fillInfoHeight + BIN_CANVAS.cellPadding;
+        const width = viewport.clientWidth;
+        const binsPerRow = Math.max(1, Math.floor(width / cellWidth));
+        const rows = Math.ceil(bins.length / binsPerRow);
+        const columns = Math.min(binsPerRow, bins.length);
+        
+        return {
+            isMobile: isMobile,
+            binWidth: binWidth,
+            binHeight: binHeight,
+            cellWidth: cellWidth,
+            cellHeight: cellHeight,
+            width: width,
+            binsPerRow: binsPerRow,
+            rows: rows,
+            totalHeight: rows * cellHeight,
+            offsetX: (width - columns * cellWidth) / 2 // Center the grid
+        };
+    }
     
-    const binDiv = document.createElement('div');
-    binDiv.className = 'bin';
+    function draw() {
+        drawPending = false;
+        
+        // Hidden containers (e.g. collapsed accordion sections) have no width yet
+        if (!viewport.clientWidth) return;
+        
+        layout = computeLayout();
+        const viewHeight = Math.min(layout.totalHeight, BIN_CANVAS.maxViewportHeight);
+        viewport.style.height = `${viewHeight}px`;
+        spacer.style.height = `${layout.totalHeight - viewHeight}px`;
+        
+        // Scale the backing store for sharp rendering on high-DPI screens
+        const ratio = window.devicePixelRatio || 1;
+        canvas.width = layout.width * ratio;
+        canvas.height = viewHeight * ratio;
+        canvas.style.width = `${layout.width}px`;
+        canvas.style.height = `${viewHeight}px`;
+        
+        const ctx = canvas.getContext('2d');
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        ctx.clearRect(0, 0, layout.width, viewHeight);
+        
+        const styles = getComputedStyle(document.documentElement);
+        const colors = {
+            border: styles.getPropertyValue('--bin-border-color').trim() || '#ccc',
+            background: styles.getPropertyValue('--bin-bg-color').trim() || '#f8f9fa',
+            fillInfo: styles.getPropertyValue('--fill-info-color').trim() || '#6c757d',
+            text: styles.getPropertyValue('--bs-body-color').trim() || '#212529'
+        };
+        
+        // Only draw the rows that intersect the viewport
+        const scrollTop = viewport.scrollTop;
+        const firstRow = Math.floor(scrollTop / layout.cellHeight);
+        const lastRow = Math.min(layout.rows - 1, Math.floor((scrollTop + viewHeight) / layout.cellHeight));
+        
+        for (let row = firstRow; row <= lastRow; row++) {
+            for (let col = 0; col < layout.binsPerRow; col++) {
+                const index = row * layout.binsPerRow + col;
+                if (index >= bins.length) break;
+                
+                const x = layout.offsetX + col * layout.cellWidth + BIN_CANVAS.cellPadding / 2;
+                const y = row * layout.cellHeight - scrollTop + BIN_CANVAS.cellPadding / 2;
+                drawBinOnCanvas(ctx, bins[index], x, y, layout, colors);
+            }
+        }
+    }
     
-    // Responsive design - adjust item display based on screen size
-    const isMobile = window.innerWidth < 576;
+    function scheduleDraw() {
+        if (drawPending) return;
+        drawPending = true;
+        window.requestAnimationFrame(draw);
+    }
     
-    // Add items to bin
-    let currentHeight = 0;
-    bin.items.forEach((item, index) => {
-        const itemWeight = bin.item_weights[index];
-        const itemHeight = (itemWeight / bin.capacity) * 100; // As percentage of bin height
-        
-        const itemDiv = document.createElement('div');
-        itemDiv.className = 'item';
-        // Position from bottom of container
-        itemDiv.style.height = `${itemHeight}%`;
-        itemDiv.style.bottom = `${currentHeight}%`;
-        itemDiv.style.backgroundColor = getRandomColor(item);
-        
-        // Display label or weight
-        let itemText = itemWeight;
-        if (bin.item_labels && bin.item_labels[index]) {
-            // If we have labels, use them for tooltips
-            itemDiv.setAttribute('data-bs-toggle', 'tooltip');
-            itemDiv.setAttribute('data-bs-placement', 'top');
-            itemDiv.setAttribute('title', `${bin.item_labels[index]}: ${itemWeight}`);
-            
-            // On mobile or for small items, still just show weight
-            if (!isMobile && itemHeight > 15) {
-                itemText = bin.item_labels[index];
+    // Find the bin (and item, if drawn individually) under the mouse for the tooltip
+    function describePoint(offsetX, offsetY) {
+        if (!layout) return '';
+        
+        const y = offsetY + viewport.scrollTop;
+        const row = Math.floor(y / layout.cellHeight);
+        const col = Math.floor((offsetX - layout.offsetX) / layout.cellWidth);
+        if (col < 0 || col >= layout.binsPerRow) return '';
+        
+        const bin = bins[row * layout.binsPerRow + col];
+        if (!bin) return '';
+        
+        const binSummary = `Bin ${bin.bin_id + 1}: ${bin.items.length} items, ${bin.total_weight} / ${bin.capacity}`;
+        if (isAggregated(bin, layout)) return binSummary;
+        
+        // Items are stacked from the bottom of the bin
+        const binBottom = row * layout.cellHeight + BIN_CANVAS.cellPadding / 2 + BIN_CANVAS.labelHeight + layout.binHeight;
+        const weightFromBottom = (binBottom - y) / layout.binHeight * bin.capacity;
+        let cumulative = 0;
+        for (let index = 0; index < bin.items.length; index++) {
+            cumulative += bin.item_weights[index];
+            if (weightFromBottom >= 0 && weightFromBottom < cumulative) {
+                const itemName = bin.item_labels && bin.item_labels[index]
+                    ? bin.item_labels[index]
+                    : `Item ${bin.items[index]}`;
+                return `${itemName}: ${bin.item_weights[index]}`;
             }
         }
-        
-        // On mobile, only show text for larger items
-        if (!isMobile || itemHeight > 10) {
-            itemDiv.textContent = itemText;
-        }
-        
-        binDiv.appendChild(itemDiv);
-        currentHeight += itemHeight;
+        return binSummary;
+    }
+    
+    viewport.addEventListener('scroll', scheduleDraw, { passive: true });
+    canvas.addEventListener('mousemove', function(e) {
+        canvas.title = describePoint(e.offsetX, e.offsetY);
     });
     
-    // Add fill rate label
-    const fillRateDiv = document.createElement('div');
-    fillRateDiv.className = 'fill-info';
-    const fillRate = (bin.total_weight / bin.capacity) * 100;
-    fillRateDiv.textContent = `${fillRate.toFixed(0)}% full`;
+    const view = { element: viewport, draw: draw };
+    activeBinCanvases.push(view);
+    return view;
+}
+
+// Whether a bin's items are too thin to draw individually
+function isAggregated(bin, layout) {
+    const filledHeight = (bin.total_weight / bin.capacity) * layout.binHeight;
+    return filledHeight / bin.items.length < BIN_CANVAS.minItemHeight;
+}
+
+// Draw a single bin with its label and fill info at (x, y)
+function drawBinOnCanvas(ctx, bin, x, y, layout, colors) {
+    const binWidth = layout.binWidth;
+    const binHeight = layout.binHeight;
+    const binTop = y + BIN_CANVAS.labelHeight;
+    const fontSize = layout.isMobile ? 11 : 13;
+    
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'middle';
+    
+    // Bin label
+    ctx.fillStyle = colors.text;
+    ctx.font = `bold ${fontSize}px sans-serif`;
+    ctx.fillText(`Bin ${bin.bin_id + 1}`, x + binWidth / 2, y + BIN_CANVAS.labelHeight / 2);
+    
+    // Bin body
+    ctx.fillStyle = colors.background;
+    ctx.fillRect(x, binTop, binWidth, binHeight);
+    
+    ctx.font = `${fontSize - 1}px sans-serif`;
+    if (isAggregated(bin, layout)) {
+        // Too many small items: one fill bar with an item-count summary
+        const fillHeight = Math.min(bin.total_weight / bin.capacity, 1) * binHeight;
+        ctx.fillStyle = 'hsl(210, 60%, 60%)';
+        ctx.fillRect(x, binTop + binHeight - fillHeight, binWidth, fillHeight);
+        
+        ctx.fillStyle = '#fff';
+        ctx.fillText(`${bin.items.length} items`, x + binWidth / 2, binTop + binHeight - fillHeight / 2);
+    } else {
+        // Stack items from the bottom of the bin
+        let currentHeight = 0;
+        bin.items.forEach((item, index) => {
+            const itemWeight = bin.item_weights[index];
+            const itemHeight = (itemWeight / bin.capacity) * binHeight;
+            const itemTop = binTop + binHeight - currentHeight - itemHeight;
+            
+            ctx.fillStyle = getRandomColor(item);
+            ctx.fillRect(x, itemTop, binWidth, itemHeight);
+            ctx.fillStyle = 'rgba(255, 255, 255, 0.4)';
+            ctx.fillRect(x, itemTop, binWidth, 1);
+            
+            // Only show text where it fits; labels need a bit more room
+            if (itemHeight > fontSize + 2) {
+                let itemText = String(itemWeight);
+                if (bin.item_labels && bin.item_labels[index] && !layout.isMobile && itemHeight > 15 * binHeight / 100) {
+                    itemText = bin.item_labels[index];
+                }
+                ctx.fillStyle = '#fff';
+                ctx.fillText(itemText, x + binWidth / 2, itemTop + itemHeight / 2, binWidth - 4);
+            }
+            
+            currentHeight += itemHeight;
+        });
+    }
     
-    binContainer.appendChild(binLabel);
-    binContainer.appendChild(binDiv);
-    binContainer.appendChild(fillRateDiv);
+    // Bin border
+    ctx.strokeStyle = colors.border;
+    ctx.lineWidth = 2;
+    ctx.strokeRect(x, binTop, binWidth, binHeight);
     
-    return binContainer;
-} 
\ No newline at end of file
+    // Fill rate label
+    const fillRate = (bin.total_weight / bin.capacity) * 100;
+    ctx.fillStyle = colors.fillInfo;
+    ctx.font = `${fontSize - 2}px sans-serif`;
+    ctx.fillText(`${fillRate.toFixed(0)}% full`, x + binWidth / 2, binTop + binHeight + BIN_CANVAS.fillInfoHeight / 2);
+}
+
+// Redraw all bin canvases that are still on the page
+function redrawBinCanvases() {
+    for (let i = activeBinCanvases.length - 1; i >= 0; i--) {
+        if (!document.body.contains(activeBinCanvases[i].element)) {
+            activeBinCanvases.splice(i, 1);
+        } else {
+            activeBinCanvases[i].draw();
+        }
+    }
+}
@@ -1,14 +1,29 @@
 import os
 import json
 import time
+import hmac
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify
+from functools import wraps
+from flask import Flask, render_template, request, jsonify, g
 from solver import solve_bin_packing
+from constraints import validate_item_indices, remap_constraints
+from lns import improve_solution
+from admission import AdmissionController, AdmissionRejected, estimate_request_cost
+from profiling import RequestProfiler, profiling_lock
+from work_queue import QueueClient, QueueError
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
 
 app = Flask(__name__)
 
-# Ensure the configs directory exists
-CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+# Ensure the configs directory exists (BINPACK_DATA_DIR overrides the default location)
+CONFIGS_DIR = os.environ.get('BINPACK_DATA_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 os.makedirs(CONFIGS_DIR, exist_ok=True)
 
 # Store configs in a file
@@ -17,12 +32,174 @@ if not os.path.exists(CONFIGS_FILE):
     with open(CONFIGS_FILE, 'w') as f:
         json.dump([], f)
 
+# Serializes read-modify-write of the configs file between threads and worker processes
+configs_thread_lock = threading.Lock()
+
+@contextmanager
+def configs_lock():
+    with configs_thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(CONFIGS_FILE + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def write_configs(configs):
+    """Write the configs file atomically so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=CONFIGS_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(configs, f, indent=2)
+        os.replace(tmp_path, CONFIGS_FILE)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+# Admission control for the expensive solver endpoints (per worker process)
+admission = AdmissionController.from_env()
+
+# Set BINPACK_TRUST_PROXY=1 only when the app is reachable solely through nginx,
+# which overwrites X-Real-IP with the client address
+TRUST_PROXY = os.environ.get('BINPACK_TRUST_PROXY') == '1'
+
+# Test only: loadtest.py sets this so its simulated clients get separate buckets
+LOADTEST_CLIENT_HEADER = os.environ.get('BINPACK_LOADTEST_CLIENT_HEADER') == '1'
+
+def client_id():
+    """Identify the client for rate limiting. X-Forwarded-For is never used:
+    nginx appends to whatever the client sent, so its first entry is spoofable."""
+    if LOADTEST_CLIENT_HEADER and request.headers.get('X-Loadtest-Client'):
+        return request.headers['X-Loadtest-Client']
+    if TRUST_PROXY and request.headers.get('X-Real-IP'):
+        return request.headers['X-Real-IP']
+    return request.remote_addr
+
+def admission_controlled(endpoint):
+    """Admit the request based on its estimated cost, or reject it with 429/503 and Retry-After"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(silent=True) or {}
+            try:
+                cost = estimate_request_cost(endpoint, data)
+                ticket = admission.admit(client_id(), cost)
+            except AdmissionRejected as e:
+                response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+                if e.retry_after is not None:
+                    response.headers['Retry-After'] = str(e.retry_after)
+                return response, e.status
+            except (TypeError, ValueError) as e:
+                return jsonify({'error': f'Invalid request: {str(e)}'}), 400
+            
+            try:
+                return f(*args, **kwargs)
+            finally:
+                admission.release(ticket)
+        return wrapper
+    return decorator
+
+# With BINPACK_BROKER set to the host:port of a work_queue.py broker, solves run
+# on solver workers (solver_worker.py) and this app is only the API front end
+BROKER_ADDRESS = os.environ.get('BINPACK_BROKER')
+JOB_TIMEOUT = float(os.environ.get('BINPACK_JOB_TIMEOUT', 120))
+work_queue = QueueClient(BROKER_ADDRESS) if BROKER_ADDRESS else None
+
+def run_engine(engine, stats=None, **kwargs):
+    """Run a solver engine ('solve' or 'improve') in this process, or on a
+    solver worker when a broker is configured. Raises QueueError when no
+    worker returns a result."""
+    if work_queue is None:
+        if engine == 'solve':
+            return solve_bin_packing(stats=stats, **kwargs)
+        return improve_solution(**kwargs)
+    
+    reply = work_queue.run({'engine': engine, 'kwargs': kwargs, 'stats': stats is not None}, JOB_TIMEOUT)
+    if 'error' in reply:
+        raise QueueError(reply['error'])
+    if stats is not None:
+        stats.update(reply.get('stats', {}))
+    return reply['result']
+
+def queue_unavailable(e):
+    app.logger.error(f"Work queue error: {str(e)}")
+    response = jsonify({'error': 'No solver is available, please retry later'})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+# Profiling (?profile=1) is only available to requests carrying this admin token
+ADMIN_TOKEN = os.environ.get('BINPACK_ADMIN_TOKEN')
+
+# Collapsed-stack files for flamegraphs are written here
+PROFILES_DIR = os.path.join(CONFIGS_DIR, 'profiles')
+
+def is_admin():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+def solver_stats_slot(objective):
+    """A dict for solve_bin_packing to fill with statistics, if the request is being profiled"""
+    if 'solver_stats' not in g:
+        return None
+    stats = {'objective': objective}
+    g.solver_stats.append(stats)
+    return stats
+
+def profiled(f):
+    """With ?profile=1 (admins only), attach a cProfile summary, peak memory and
+    solver statistics to the JSON response. Add &flamegraph=1 to also write a
+    collapsed-stack file for flamegraph tools."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if request.args.get('profile') != '1':
+            return f(*args, **kwargs)
+        
+        if not is_admin():
+            return jsonify({'error': 'Profiling is restricted to admins'}), 403
+        
+        if not profiling_lock.acquire(blocking=False):
+            response = jsonify({'error': 'Another request is being profiled, please retry later'})
+            response.headers['Retry-After'] = '5'
+            return response, 429
+        
+        try:
+            flamegraph_path = None
+            if request.args.get('flamegraph') == '1':
+                os.makedirs(PROFILES_DIR, exist_ok=True)
+                filename = f"{request.endpoint}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded"
+                flamegraph_path = os.path.join(PROFILES_DIR, filename)
+            
+            g.solver_stats = []
+            with RequestProfiler(flamegraph_path=flamegraph_path) as profiler:
+                response = app.make_response(f(*args, **kwargs))
+        finally:
+            profiling_lock.release()
+        
+        body = response.get_json(silent=True)
+        if isinstance(body, dict):
+            body['profile'] = profiler.report()
+            body['profile']['solver_stats'] = g.solver_stats
+            response.set_data(json.dumps(body))
+        return response
+    return wrapper
+
+# Upper bound on the improvement stage's time limit (seconds) for API requests
+MAX_IMPROVE_TIME_LIMIT = 60
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
 # Define routes
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/api/solve', methods=['POST'])
+@admission_controlled('solve')
+@profiled
 def api_solve():
     try:
         # Parse input data
@@ -34,6 +211,11 @@ def api_solve():
         sort_method = data.get('sort_method', 'none')
         bin_count = data.get('bin_count', None)
         item_labels = data.get('item_labels', [])
+        improve = data.get('improve', False)
+        improve_time_limit = data.get('improve_time_limit', 5)
+        improve_workers = data.get('improve_workers', None)
+        conflicts = data.get('conflicts') or []
+        affinity_groups = data.get('affinity_groups') or []
         
         # Validate input
         if not weights:
@@ -48,6 +230,25 @@ def api_solve():
         if objective == 'balance_bins' and (not bin_count or bin_count <= 0):
             return jsonify({'error': 'Number of bins must be positive for balance_bins objective'}), 400
         
+        if improve and objective != 'min_bins':
+            return jsonify({'error': 'The improvement stage is only available for the min_bins objective'}), 400
+        
+        if improve and (not is_number(improve_time_limit) or not 0 < improve_time_limit <= MAX_IMPROVE_TIME_LIMIT):
+            return jsonify({'error': f'Improvement time limit must be a number of seconds between 0 and {MAX_IMPROVE_TIME_LIMIT}'}), 400
+        
+        if improve and improve_workers is not None:
+            if not isinstance(improve_workers, int) or isinstance(improve_workers, bool) or improve_workers < 1:
+                return jsonify({'error': 'Improvement workers must be an integer of at least 1'}), 400
+            # Never start more processes than there are cores
+            improve_workers = min(improve_workers, os.cpu_count() or 1)
+        
+        if improve and (conflicts or affinity_groups):
+            return jsonify({'error': 'The improvement stage does not support conflicts or affinity groups'}), 400
+        
+        constraint_error = validate_item_indices(len(weights), conflicts, affinity_groups)
+        if constraint_error:
+            return jsonify({'error': constraint_error}), 400
+        
         # Apply sorting if specified
         original_weights = weights.copy()
         if sort_method == 'desc':
@@ -74,21 +275,61 @@ def api_solve():
             if item_labels:
                 item_labels = [item_labels[i] for i in indices]
         
+        # Conflicts and affinity groups refer to items in input order
+        if sort_method in ('desc', 'asc', 'random'):
+            conflicts, affinity_groups = remap_constraints(conflicts, affinity_groups, indices)
+        
         # Call the solver
         start_time = time.time()
-        result = solve_bin_packing(
-            weights,
-            bin_capacity,
-            objective,
-            min_items_per_bin,
-            bin_count,
-            item_labels
+        result = run_engine(
+            'solve',
+            order_weights=weights,
+            bin_capacity=bin_capacity,
+            objective=objective,
+            min_items_per_bin=min_items_per_bin,
+            bin_count=bin_count,
+            item_labels=item_labels,
+            stats=solver_stats_slot(objective),
+            conflicts=conflicts,
+            affinity_groups=affinity_groups
         )
         
         # If result contains an error, return it
         if 'error' in result:
             return jsonify(result), 400
         
+        # Optional large-neighbourhood search post-stage (nothing to gain on a proven optimum)
+        if improve and result['status'] != 'optimal':
+            improved = run_engine(
+                'improve',
+                order_weights=weights,
+                bin_capacity=bin_capacity,
+                initial_bins=[bin_data['items'] for bin_data in result['bins']],
+                min_items_per_bin=min_items_per_bin,
+                time_limit=improve_time_limit,
+                workers=improve_workers,
+                item_labels=item_labels
+            )
+            if 'error' in improved:
+                return jsonify(improved), 400
+            
+            result['bins'] = improved['bins']
+            result['bin_count'] = improved['bin_count']
+            result['improvement'] = {
+                'initial_bin_count': improved['initial_bin_count'],
+                'trace': improved['improvement_trace'],
+                'iterations': improved['iterations'],
+                'workers': improved['workers'],
+                'seed': improved['seed']
+            }
+            
+            # The solver's status and warning described the packing before improvement
+            result.pop('warning', None)
+            if improved['bin_count'] <= improved['lower_bound']:
+                result['status'] = 'optimal'
+            else:
+                result['warning'] = 'Improved by the LNS stage; the packing may still not be optimal'
+        
         # Calculate total weight
         total_weight = sum(sum(bin_data.get('item_weights', [])) for bin_data in result['bins'])
         
@@ -102,11 +343,15 @@ def api_solve():
         
         return jsonify(result)
     
+    except QueueError as e:
+        return queue_unavailable(e)
     except Exception as e:
         app.logger.error(f"Error in API: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/compare', methods=['POST'])
+@admission_controlled('compare')
+@profiled
 def api_compare():
     try:
         # Parse input data
@@ -117,6 +362,12 @@ def api_compare():
         sort_method = data.get('sort_method', 'none')
         bin_count = data.get('bin_count', 3)
         item_labels = data.get('item_labels', [])
+        conflicts = data.get('conflicts') or []
+        affinity_groups = data.get('affinity_groups') or []
+        
+        constraint_error = validate_item_indices(len(weights), conflicts, affinity_groups)
+        if constraint_error:
+            return jsonify({'error': constraint_error}), 400
         
         # Apply sorting if specified
         original_weights = weights.copy()
@@ -144,6 +395,10 @@ def api_compare():
             if item_labels:
                 item_labels = [item_labels[i] for i in indices]
         
+        # Conflicts and affinity groups refer to items in input order
+        if sort_method in ('desc', 'asc', 'random'):
+            conflicts, affinity_groups = remap_constraints(conflicts, affinity_groups, indices)
+        
         # Compare different objectives
         objectives = ['min_bins', 'max_weight', 'max_items', 'balance_bins']
         results = {}
@@ -160,13 +415,17 @@ def api_compare():
             try:
                 # Call the solver
                 start_time = time.time()
-                result = solve_bin_packing(
-                    weights.copy(),
-                    bin_capacity,
-                    objective,
-                    min_items_per_bin,
-                    (bin_count if objective == 'balance_bins' else None),
-                    item_labels.copy() if item_labels else []
+                result = run_engine(
+                    'solve',
+                    order_weights=weights.copy(),
+                    bin_capacity=bin_capacity,
+                    objective=objective,
+                    min_items_per_bin=min_items_per_bin,
+                    bin_count=(bin_count if objective == 'balance_bins' else None),
+                    item_labels=item_labels.copy() if item_labels else [],
+                    stats=solver_stats_slot(objective),
+                    conflicts=conflicts,
+                    affinity_groups=affinity_groups
                 )
                 
                 # Check for solver error
@@ -196,6 +455,8 @@ def api_compare():
                 if max(weights) > bin_capacity:
                     results[objective]['warning'] = 'Some items exceed bin capacity'
                 
+            except QueueError:
+                raise  # No point trying the other objectives
             except Exception as e:
                 results[objective] = {
                     'success': False,
@@ -204,6 +465,8 @@ def api_compare():
         
         return jsonify({'results': results})
     
+    except QueueError as e:
+        return queue_unavailable(e)
     except Exception as e:
         app.logger.error(f"Error in comparison API: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -214,19 +477,19 @@ def api_save_config():
         # Parse input data
         data = request.json
         
-        # Load existing configs
-        with open(CONFIGS_FILE, 'r') as f:
-            configs = json.load(f)
-        
         # Add timestamp
         data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        # Add to configs
-        configs.append(data)
-        
-        # Save configs
-        with open(CONFIGS_FILE, 'w') as f:
-            json.dump(configs, f, indent=2)
+        with configs_lock():
+            # Load existing configs
+            with open(CONFIGS_FILE, 'r') as f:
+                configs = json.load(f)
+            
+            # Add to configs
+            configs.append(data)
+            
+            # Save configs
+            write_configs(configs)
         
         return jsonify({'success': True})
     
@@ -0,0 +1,310 @@
+"""TCP work queue connecting the web front end to solver workers.
+
+The broker keeps a queue of jobs in memory. Front ends submit a job and wait
+for its result on the same connection; solver workers (solver_worker.py, on
+any number of hosts) long-poll for jobs, send heartbeats while they work and
+report results. Jobs of a worker that stops sending heartbeats, or that
+reports a failure, are put back at the front of the queue for another worker.
+
+Messages are JSON objects, one per line. Each request has an "op":
+    run        {job, timeout}           -> {result} or {error}   (front end)
+    fetch      {worker_id, wait}        -> {job_id, job} or {job_id: null}
+    heartbeat  {worker_id}              -> {ok}
+    complete   {worker_id, job_id, result}
+    fail       {worker_id, job_id, error}
+    stats      {}                       -> queue and worker statistics
+
+Example:
+    python work_queue.py --bind 0.0.0.0:7070
+"""
+import sys
+import json
+import time
+import socket
+import argparse
+import itertools
+import threading
+import socketserver
+from collections import deque
+
+DEFAULT_PORT = 7070
+
+# Workers send a heartbeat this often (seconds)...
+HEARTBEAT_INTERVAL = 2
+# ...and are presumed dead, and their jobs reassigned, after this long without one
+HEARTBEAT_TIMEOUT = 10
+
+# A job is failed for good after running on this many workers
+MAX_ATTEMPTS = 3
+
+class QueueError(Exception):
+    """The broker cannot be reached, or did not return a result in time"""
+
+def parse_address(address, default_port=DEFAULT_PORT):
+    """Parse 'host:port' (or just 'host') into a (host, port) tuple"""
+    host, sep, port = address.rpartition(':')
+    if not sep:
+        return address or '127.0.0.1', default_port
+    return host or '127.0.0.1', int(port)
+
+def send_message(wfile, message):
+    wfile.write(json.dumps(message).encode() + b'\n')
+    wfile.flush()
+
+def read_message(rfile):
+    """Read one message, or return None when the connection is closed"""
+    line = rfile.readline()
+    return json.loads(line) if line else None
+
+class Broker:
+    """In-memory job queue with heartbeat-based reassignment.
+    Every job is in exactly one of: pending (queued), running (assigned to a
+    worker) or done (result waiting to be picked up by its submitter).
+    """
+    def __init__(self, heartbeat_timeout=HEARTBEAT_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._pending = deque()
+        self._jobs = {}  # job id -> {'job', 'attempts', 'worker', 'result'}
+        self._workers = {}  # worker id -> {'last_seen', 'jobs', 'completed'}
+        self._counters = {'submitted': 0, 'completed': 0, 'requeued': 0, 'failed': 0, 'expired': 0}
+
+    def run(self, job, timeout):
+        """Queue a job and wait for its result.
+
+        Returns:
+          - The worker's result, or a dictionary with an error if the job
+            failed on every attempt or did not finish within timeout.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            job_id = next(self._ids)
+            self._jobs[job_id] = {'job': job, 'attempts': 0, 'worker': None, 'result': None}
+            self._pending.append(job_id)
+            self._counters['submitted'] += 1
+            self._cond.notify_all()
+
+            while self._jobs[job_id]['result'] is None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    # Give up; a worker still running it will find the job gone on completion
+                    self._forget(job_id)
+                    self._counters['expired'] += 1
+                    return {'error': 'No solver worker finished the job in time', 'queue_timeout': True}
+                self._cond.wait(remaining)
+
+            return self._jobs.pop(job_id)['result']
+
+    def fetch(self, worker_id, wait):
+        """Hand the next pending job to a worker, waiting up to wait seconds for one"""
+        deadline = time.time() + wait
+        with self._cond:
+            worker = self._seen(worker_id)
+            while not self._pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None, None
+                self._cond.wait(remaining)
+                worker = self._seen(worker_id)
+
+            job_id = self._pending.popleft()
+            state = self._jobs[job_id]
+            state['attempts'] += 1
+            state['worker'] = worker_id
+            worker['jobs'].add(job_id)
+            return job_id, state['job']
+
+    def heartbeat(self, worker_id):
+        with self._cond:
+            self._seen(worker_id)
+
+    def complete(self, worker_id, job_id, result):
+        with self._cond:
+            worker = self._seen(worker_id)
+            worker['jobs'].discard(job_id)
+            state = self._jobs.get(job_id)
+            # Ignore results of jobs that expired or were reassigned and already finished elsewhere
+            if state is None or state['result'] is not None:
+                return
+            if job_id in self._pending:
+                self._pending.remove(job_id)
+            state['result'] = result
+            worker['completed'] += 1
+            self._counters['completed'] += 1
+            self._cond.notify_all()
+
+    def fail(self, worker_id, job_id, error):
+        """A worker could not run a job (e.g. its solver process crashed): retry it elsewhere"""
+        with self._cond:
+            self._seen(worker_id)['jobs'].discard(job_id)
+            if job_id in self._jobs and self._jobs[job_id]['worker'] == worker_id:
+                self._requeue(job_id, error)
+
+    def reap(self):
+        """Reassign the jobs of workers that stopped sending heartbeats"""
+        with self._cond:
+            cutoff = time.time() - self.heartbeat_timeout
+            for worker_id, worker in list(self._workers.items()):
+                if worker['last_seen'] < cutoff:
+                    del self._workers[worker_id]
+                    for job_id in worker['jobs']:
+                        if job_id in self._jobs and self._jobs[job_id]['worker'] == worker_id:
+                            self._requeue(job_id, f"Worker {worker_id} stopped responding")
+
+    def stats(self):
+        with self._cond:
+            now = time.time()
+            return {
+                'pending': len(self._pending),
+                'running': sum(len(w['jobs']) for w in self._workers.values()),
+                'workers': {
+                    worker_id: {
+                        'last_seen_s': round(now - w['last_seen'], 1),
+                        'running': len(w['jobs']),
+                        'completed': w['completed']
+                    }
+                    for worker_id, w in self._workers.items()
+                },
+                **self._counters
+            }
+
+    def _seen(self, worker_id):
+        worker = self._workers.setdefault(worker_id, {'last_seen': 0, 'jobs': set(), 'completed': 0})
+        worker['last_seen'] = time.time()
+        return worker
+
+    def _requeue(self, job_id, error):
+        state = self._jobs[job_id]
+        state['worker'] = None
+        if state['attempts'] >= self.max_attempts:
+            state['result'] = {'error': f"Job failed on {state['attempts']} workers: {error}"}
+            self._counters['failed'] += 1
+        else:
+            # Retried jobs go first, they have waited longest
+            self._pending.appendleft(job_id)
+            self._counters['requeued'] += 1
+        self._cond.notify_all()
+
+    def _forget(self, job_id):
+        self._jobs.pop(job_id, None)
+        if job_id in self._pending:
+            self._pending.remove(job_id)
+
+class BrokerHandler(socketserver.StreamRequestHandler):
+    """Serves the messages of one connection, one at a time"""
+    def handle(self):
+        broker = self.server.broker
+        while True:
+            try:
+                message = read_message(self.rfile)
+            except (ValueError, OSError):
+                return
+            if message is None:
+                return
+
+            op = message.get('op')
+            if op == 'run':
+                reply = {'result': broker.run(message['job'], message.get('timeout', 60))}
+            elif op == 'fetch':
+                job_id, job = broker.fetch(message['worker_id'], min(message.get('wait', 5), broker.heartbeat_timeout / 2))
+                reply = {'job_id': job_id, 'job': job}
+            elif op == 'heartbeat':
+                broker.heartbeat(message['worker_id'])
+                reply = {'ok': True}
+            elif op == 'complete':
+                broker.complete(message['worker_id'], message['job_id'], message['result'])
+                reply = {'ok': True}
+            elif op == 'fail':
+                broker.fail(message['worker_id'], message['job_id'], message.get('error', 'unknown error'))
+                reply = {'ok': True}
+            elif op == 'stats':
+                reply = broker.stats()
+            else:
+                reply = {'error': f"Unknown op {op!r}"}
+
+            try:
+                send_message(self.wfile, reply)
+            except OSError:
+                # A job the worker never received must go back to the queue
+                if op == 'fetch' and reply['job_id'] is not None:
+                    broker.fail(message['worker_id'], reply['job_id'], 'Connection lost while handing out the job')
+                return
+
+class BrokerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, broker):
+        super().__init__(address, BrokerHandler)
+        self.broker = broker
+
+def serve(address, heartbeat_timeout=HEARTBEAT_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+    """Run a broker until interrupted"""
+    broker = Broker(heartbeat_timeout, max_attempts)
+    server = BrokerServer(address, broker)
+
+    def reaper():
+        while True:
+            time.sleep(heartbeat_timeout / 4)
+            broker.reap()
+
+    threading.Thread(target=reaper, daemon=True).start()
+    print(f"Work queue broker listening on {address[0]}:{address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+class QueueClient:
+    """Client for the broker. Opens a connection per call, so one client can
+    be shared between threads."""
+    def __init__(self, address, connect_timeout=5):
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.connect_timeout = connect_timeout
+
+    def request(self, message, timeout=None):
+        try:
+            with socket.create_connection(self.address, timeout=self.connect_timeout) as sock:
+                sock.settimeout(timeout)
+                with sock.makefile('rwb') as f:
+                    send_message(f, message)
+                    reply = read_message(f)
+        except OSError as e:
+            raise QueueError(f"Work queue at {self.address[0]}:{self.address[1]} is unavailable: {e}")
+        if reply is None:
+            raise QueueError("Work queue closed the connection")
+        return reply
+
+    def run(self, job, timeout=60):
+        """Run a job on a solver worker and return its result"""
+        # The socket waits a little longer than the broker, which answers on timeout
+        return self.request({'op': 'run', 'job': job, 'timeout': timeout}, timeout=timeout + 5)['result']
+
+    def stats(self):
+        return self.request({'op': 'stats'}, timeout=self.connect_timeout)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Work queue broker for solver workers.")
+    parser.add_argument('--bind', default=f'0.0.0.0:{DEFAULT_PORT}', help=f"Address to listen on (default: 0.0.0.0:{DEFAULT_PORT})")
+    parser.add_argument('--heartbeat-timeout', type=float, default=HEARTBEAT_TIMEOUT,
+                        help="Seconds without a heartbeat before a worker's jobs are reassigned")
+    parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help="Workers a job is tried on before it fails")
+    parser.add_argument('--stats', metavar='HOST:PORT', help="Print the statistics of a running broker and exit")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.stats:
+        print(json.dumps(QueueClient(args.stats).stats(), indent=2))
+        return 0
+    try:
+        serve(parse_address(args.bind), args.heartbeat_timeout, args.max_attempts)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())